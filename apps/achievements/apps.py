@@ -1,5 +1,10 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class AchievementsConfig(AppConfig):
+class AchievementsConfig(FormsConfig):
     name = "apps.achievements"
+    forms = [
+        "apps.achievements.forms.CreateAchievement",
+        "apps.achievements.forms.UpdateAchievement",
+        "apps.achievements.forms.DeleteAchievement",
+    ]
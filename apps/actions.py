@@ -1,56 +1,23 @@
-from typing import Any, Protocol
-
-from django.contrib.auth.models import AbstractBaseUser, AnonymousUser
-
-from apps.achievements.forms import (
-    CreateAchievement,
-    DeleteAchievement,
-    UpdateAchievement,
-)
-from apps.goals.forms import (
-    AddMonitor,
-    CreateGoal,
-    DecreaseProgress,
-    DeleteGoal,
-    DeleteMonitor,
-    IncreaseProgress,
-    UpdateGoal,
-    UpdateGoalSettings,
-    UpdateMonitor,
-)
-from apps.notes.forms import CreateNote, DeleteNote, UpdateNote
-from apps.story.forms import UpdateStory
-from apps.todos.forms import (
-    CreateNeverEndingTodo,
-    CreateNormalTodo,
-    CreateNotesTodo,
-    CreatePage,
-    CreatePipelineTodo,
-    CreateRepetitiveTodo,
-    CreateTodoFast,
-    DeletePage,
-    DeleteTodo,
-    SharePage,
-    ToggleTodo,
-    UpdateNeverEndingTodo,
-    UpdateNormalTodo,
-    UpdateNotesTodo,
-    UpdatePage,
-    UpdateRepetitiveTodo,
-    UpdateTodoSettings,
-)
-from apps.uploads.forms import CreateUpload, DeleteUpload, UploadFile
-from apps.users.forms import ChangeEmail, ChangePassword, Login, Register, ResetPassword
-from apps.users.models import CustomUser
+from typing import TYPE_CHECKING, Any, Iterable, Protocol
+
+from django.apps import AppConfig
+from django.utils.module_loading import import_string
+
 from config.form_addons import Addons
 
+if TYPE_CHECKING:
+    # the app configs import this module before the models are ready
+    from django.contrib.auth.models import AbstractBaseUser, AnonymousUser
+
+    from apps.users.models import CustomUser
+
 
 class FormClass(Protocol):
     addons: Addons
 
     def __init__(
         self,
-        user: CustomUser | AbstractBaseUser | AnonymousUser,
+        user: "CustomUser | AbstractBaseUser | AnonymousUser",
         opts: dict[str, Any],
         *args,
         **kwargs,
@@ -63,50 +30,34 @@ class FormClass(Protocol):
     def _has_addon(self, key: str) -> bool: ...
 
 
-# improve to import automatically
-FORMS: list[type[FormClass]] = [
-    CreateTodoFast,
-    CreateNormalTodo,
-    UpdateNormalTodo,
-    UpdateNeverEndingTodo,
-    DeleteTodo,
-    ToggleTodo,
-    CreateNeverEndingTodo,
-    CreateRepetitiveTodo,
-    CreateNotesTodo,
-    UpdateNotesTodo,
-    UpdateRepetitiveTodo,
-    CreatePipelineTodo,
-    CreateAchievement,
-    UpdateAchievement,
-    DeleteAchievement,
-    CreateNote,
-    UpdateNote,
-    DeleteNote,
-    UpdateStory,
-    Login,
-    Register,
-    ResetPassword,
-    ChangeEmail,
-    ChangePassword,
-    CreateGoal,
-    UpdateGoal,
-    DeleteGoal,
-    AddMonitor,
-    IncreaseProgress,
-    DecreaseProgress,
-    UpdateMonitor,
-    DeleteMonitor,
-    UpdateTodoSettings,
-    UpdateGoalSettings,
-    CreateUpload,
-    UploadFile,
-    DeleteUpload,
-    CreatePage,
-    UpdatePage,
-    SharePage,
-    DeletePage,
-]
+# form name -> dotted path, declared by the app configs and filled in ready()
+FORMS: dict[str, str] = {}
+_form_classes: dict[str, type[FormClass]] = {}
+
+
+def register_forms(paths: Iterable[str]) -> None:
+    for path in paths:
+        name = path.rsplit(".", 1)[1]
+        if FORMS.get(name, path) != path:
+            raise ValueError(f"form '{name}' is registered twice")
+        FORMS[name] = path
+
+
+class FormsConfig(AppConfig):
+    """The config of an app whose forms are served by form_view."""
+
+    forms: list[str] = []
+
+    def ready(self):
+        register_forms(self.forms)
+
+
+def load_form_class(name: str) -> type[FormClass] | None:
+    # the form module is imported the first time one of its forms is needed
+    form_class = _form_classes.get(name)
+    if form_class is None and name in FORMS:
+        form_class = _form_classes[name] = import_string(FORMS[name])
+    return form_class
 
 
 NAVS = {
@@ -1,8 +1,37 @@
 from django.contrib import admin
 
-from apps.goals.models import Goal, Link, ProgressMonitor, Strategy
+from apps.goals.models import Goal, Link, ProgressMonitor, Strategy, defer_progress
 
-admin.site.register(Goal)
+
+class DeferProgressAdmin(admin.ModelAdmin):
+    actions = ["archive", "unarchive"]
+
+    def save_model(self, request, obj, form, change):
+        with defer_progress():
+            super().save_model(request, obj, form, change)
+
+    def delete_queryset(self, request, queryset):
+        # delete one by one so that links and progress stay in sync
+        with defer_progress():
+            for obj in queryset:
+                obj.delete()
+
+    @admin.action(description="Archive selected")
+    def archive(self, request, queryset):
+        with defer_progress():
+            for obj in queryset:
+                obj.is_archived = True
+                obj.save()
+
+    @admin.action(description="Unarchive selected")
+    def unarchive(self, request, queryset):
+        with defer_progress():
+            for obj in queryset:
+                obj.is_archived = False
+                obj.save()
+
+
+admin.site.register(Goal, DeferProgressAdmin)
 admin.site.register(Strategy)
-admin.site.register(ProgressMonitor)
-admin.site.register(Link)
+admin.site.register(ProgressMonitor, DeferProgressAdmin)
+admin.site.register(Link, DeferProgressAdmin)
@@ -1,5 +1,16 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class GoalsConfig(AppConfig):
+class GoalsConfig(FormsConfig):
     name = "apps.goals"
+    forms = [
+        "apps.goals.forms.CreateGoal",
+        "apps.goals.forms.UpdateGoal",
+        "apps.goals.forms.DeleteGoal",
+        "apps.goals.forms.AddMonitor",
+        "apps.goals.forms.IncreaseProgress",
+        "apps.goals.forms.DecreaseProgress",
+        "apps.goals.forms.UpdateMonitor",
+        "apps.goals.forms.DeleteMonitor",
+        "apps.goals.forms.UpdateGoalSettings",
+    ]
@@ -2,7 +2,8 @@ from django import forms
 from django.db import transaction
 from django.db.models.base import Model as Model
 
-from apps.goals.models import Goal, ProgressMonitor
+from apps.goals.graph import GoalGraph
+from apps.goals.models import Goal, Link, ProgressMonitor, defer_progress
 from apps.todos.utils import setup_datetime_field
 from apps.users.models import CustomUser
 from config.fields import CustomModelMultipleChoiceField
@@ -26,10 +27,10 @@ class CreateGoal(FormClass, OptsUserInstance[Goal], forms.ModelForm):
     def ok(self):
         self.instance.user = self.user
         parent: Goal | None = self.cleaned_data["parent"]
-        with transaction.atomic():
+        with transaction.atomic(), defer_progress():
             self.instance.save()
             if parent:
-                parent.sub_goals.add(self.instance)
+                Link.objects.create(master_goal=parent, sub_goal=self.instance)
         return self.instance.pk
 
 
@@ -54,24 +55,24 @@ class UpdateGoal(FormClass, OptsUserInstance[Goal], forms.ModelForm):
 
     def clean_parents(self):
         v = self.cleaned_data["parents"]
-        for g1 in v:
-            for g2 in self.instance.get_all_sub_goals():
-                if g2 == g1:
-                    raise forms.ValidationError(
-                        f"Recursive relationship between '{self.instance.name}' and '{g2.name}'."
-                    )
-            if g1 == self.instance:
-                raise forms.ValidationError("Goal can not have itself as parent.")
-        return v
+        pk = self.instance.pk
+        graph = GoalGraph.load(self.user)
+        current = [(m, pk) for m in graph.parents.get(pk, ())]
+        edge = graph.find_cycle([(g.pk, pk) for g in v], remove=current)
+        if edge is None:
+            return v
+        if edge[0] == pk:
+            raise forms.ValidationError("Goal can not have itself as parent.")
+        g2 = next(g for g in v if g.pk == edge[0])
+        raise forms.ValidationError(
+            f"Recursive relationship between '{self.instance.name}' and '{g2.name}'."
+        )
 
     def ok(self):
         parents: list[Goal] = self.cleaned_data["parents"]
-        with transaction.atomic():
+        with transaction.atomic(), defer_progress():
             self.instance.save()
-            for g in self.instance.master_goals.all():
-                g.sub_goals.remove(self.instance)
-            for p in parents:
-                p.sub_goals.add(self.instance)
+            Link.relink(self.instance, [p.pk for p in parents])
         return self.instance.pk
 
 
@@ -115,6 +116,17 @@ def get_monitor(user: CustomUser, pk: int) -> ProgressMonitor:
     return ProgressMonitor.objects.get(goal__user=user, pk=pk)
 
 
+def get_progress_json(monitor: ProgressMonitor) -> dict:
+    goal = Goal.objects.only("progress").get(pk=monitor.goal_id)
+    return {
+        "pk": monitor.pk,
+        "step": monitor.step,
+        "steps": monitor.steps,
+        "progress_str": monitor.progress_str,
+        "goal": {"pk": goal.pk, "progress_str": goal.progress_str},
+    }
+
+
 class IncreaseProgress(FormClass, OptsUserInstance[ProgressMonitor], forms.ModelForm):
     addons = {"navs": ["goals"]}
     submit = "Increase"
@@ -131,6 +143,9 @@ class IncreaseProgress(FormClass, OptsUserInstance[ProgressMonitor], forms.Model
         self.instance.save()
         return self.instance.pk
 
+    def get_json(self) -> dict:
+        return get_progress_json(self.instance)
+
 
 class DecreaseProgress(FormClass, OptsUserInstance[ProgressMonitor], forms.ModelForm):
     addons = {"navs": ["goals"]}
@@ -148,6 +163,9 @@ class DecreaseProgress(FormClass, OptsUserInstance[ProgressMonitor], forms.Model
         self.instance.save()
         return self.instance.pk
 
+    def get_json(self) -> dict:
+        return get_progress_json(self.instance)
+
 
 class UpdateMonitor(FormClass, OptsUserInstance[ProgressMonitor], forms.ModelForm):
     addons = {"navs": ["goals"]}
@@ -0,0 +1,69 @@
+from typing import Iterable
+
+from apps.goals.models import Link
+from apps.users.models import CustomUser
+
+EDGE = tuple[int, int]
+
+
+class GoalGraph:
+    """
+    The link graph of a user held in memory. It is loaded with one query and
+    answers reachability and cycle questions without touching the database.
+    """
+
+    def __init__(self, links: Iterable[EDGE]):
+        self.children: dict[int, set[int]] = {}
+        self.parents: dict[int, set[int]] = {}
+        for master, sub in links:
+            self.add(master, sub)
+
+    @staticmethod
+    def load(user: CustomUser) -> "GoalGraph":
+        links = Link.objects.filter(master_goal__user=user).order_by()
+        return GoalGraph(links.values_list("master_goal", "sub_goal"))
+
+    def add(self, master: int, sub: int):
+        self.children.setdefault(master, set()).add(sub)
+        self.parents.setdefault(sub, set()).add(master)
+
+    def remove(self, master: int, sub: int):
+        self.children.get(master, set()).discard(sub)
+        self.parents.get(sub, set()).discard(master)
+
+    def get_descendants(self, pk: int) -> set[int]:
+        seen: set[int] = set()
+        stack = list(self.children.get(pk, ()))
+        while stack:
+            goal = stack.pop()
+            if goal in seen:
+                continue
+            seen.add(goal)
+            stack.extend(self.children.get(goal, ()))
+        return seen
+
+    def find_cycle(
+        self, add: Iterable[EDGE], remove: Iterable[EDGE] = ()
+    ) -> EDGE | None:
+        """
+        Return the first edge of `add` that would close a cycle once `remove` is
+        removed and `add` is added, or None if the graph stays acyclic.
+        """
+        add = list(add)
+        remove = [e for e in remove if e[1] in self.children.get(e[0], ())]
+        for master, sub in remove:
+            self.remove(master, sub)
+        added: list[EDGE] = []
+        try:
+            for master, sub in add:
+                if master == sub or master in self.get_descendants(sub):
+                    return master, sub
+                if sub not in self.children.get(master, ()):
+                    self.add(master, sub)
+                    added.append((master, sub))
+            return None
+        finally:
+            for master, sub in added:
+                self.remove(master, sub)
+            for master, sub in remove:
+                self.add(master, sub)
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.goals.graph import GoalGraph
+from apps.goals.models import Goal, GoalClosure, Link
+from apps.users.models import CustomUser
+
+
+def build_graph(user: CustomUser, parents: dict[int, int], size: int) -> list[Goal]:
+    goals = Goal.objects.bulk_create(
+        [Goal(user=user, name=f"Goal {i}") for i in range(size)]
+    )
+    Link.objects.bulk_create(
+        [Link(master_goal=goals[p], sub_goal=goals[i]) for i, p in parents.items()]
+    )
+    closures = []
+    for i in parents:
+        p: int | None = parents[i]
+        while p is not None:
+            closures.append(GoalClosure(ancestor=goals[p], descendant=goals[i]))
+            p = parents.get(p)
+    GoalClosure.objects.bulk_create(closures, batch_size=5000)
+    return goals
+
+
+def check_per_parent(goal: Goal, candidates: list[Goal]):
+    # what UpdateGoal.clean_parents did: the sub goals once per selected parent,
+    # checked in full as a valid selection would be
+    found = None
+    for parent in candidates:
+        for sub_goal in goal.get_all_sub_goals():
+            if sub_goal == parent and found is None:
+                found = parent
+    return found
+
+
+def check_graph(user: CustomUser, goal: Goal, candidates: list[Goal]):
+    graph = GoalGraph.load(user)
+    return graph.find_cycle([(p.pk, goal.pk) for p in candidates])
+
+
+class Command(BaseCommand):
+    help = "Benchmark the goal cycle check on wide and deep goal graphs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wide", type=int, default=5000)
+        parser.add_argument("--deep", type=int, default=1000)
+        parser.add_argument("--parents", type=int, default=20)
+
+    def measure(self, label: str, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            duration = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<24} {duration * 1000:>10.1f} ms {len(ctx.captured_queries):>7} queries"
+        )
+
+    def run(self, label: str, parents: dict[int, int], size: int, candidates: int):
+        with transaction.atomic():
+            user = CustomUser.objects.create(email="benchgoalgraph@localhost")
+            goals = build_graph(user, parents, size)
+            # try to hang the root below goals that are all below it
+            root, selected = goals[0], goals[-candidates:]
+            self.stdout.write(f"{label}: {size} goals, {candidates} parents")
+            self.measure("  per parent", lambda: check_per_parent(root, selected))
+            self.measure("  graph", lambda: check_graph(user, root, selected))
+            transaction.set_rollback(True)
+
+    def handle(self, *args, **options):
+        candidates = options["parents"]
+        wide = options["wide"]
+        self.run("wide", {i: 0 for i in range(1, wide)}, wide, candidates)
+        deep = options["deep"]
+        self.run("deep", {i: i - 1 for i in range(1, deep)}, deep, candidates)
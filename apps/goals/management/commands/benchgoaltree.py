@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from django.template.loader import render_to_string
+
+from apps.goals.models import Goal
+from apps.goals.views import Leaf
+
+# the goal tree template before it was flattened, it includes itself per level
+RECURSIVE_TEMPLATE = """
+{% if leafes %}
+    <ul class="p-5 space-y-2 list-disc list-inside">
+        {% for l in leafes %}
+            <li class=" [&_a]:text-blue-600">
+                <div class="relative inline-flex items-center font-bold">
+                    {{ l.goal.name }} {{ l.goal.progress_str }}
+                    <a class="inline-block ml-3" href="{% url 'goal' l.goal.pk %}">V</a>
+                    <a class="inline-block ml-2"
+                       href="{% url 'form' 'UpdateGoal' %}?pk={{ l.goal.pk }}&success={% url 'goals' %}">U</a>
+                    <a class="inline-block ml-2"
+                       href="{% url 'form' 'DeleteGoal' %}?pk={{ l.goal.pk }}&success={% url 'goals' %}">D</a>
+                </div>
+                {% include "recursive.html" with leafes=l.children %}
+            </li>
+        {% endfor %}
+    </ul>
+{% endif %}
+"""
+
+
+def render_recursive(leafes: list[Leaf]) -> str:
+    engine = Engine(
+        loaders=[
+            (
+                "django.template.loaders.locmem.Loader",
+                {"recursive.html": RECURSIVE_TEMPLATE},
+            )
+        ]
+    )
+    return engine.get_template("recursive.html").render(Context({"leafes": leafes}))
+
+
+def render_flat(leafes: list[Leaf]) -> str:
+    return render_to_string("goals/symbols/goals.html", {"rows": Leaf.flatten(leafes)})
+
+
+def build_forest(size: int, seed: int) -> list[Leaf]:
+    rng = random.Random(seed)
+    leafes = [Leaf(Goal(pk=i, name=f"Goal {i}"), []) for i in range(size)]
+    roots = []
+    for i, leaf in enumerate(leafes):
+        if i == 0 or rng.random() < 0.05:
+            roots.append(leaf)
+        else:
+            leafes[rng.randrange(max(0, i - 20), i)].children.append(leaf)
+    return roots
+
+
+class Command(BaseCommand):
+    help = "Benchmark the flat goal tree template against the recursive include"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def measure(self, label: str, fn, leafes: list[Leaf], repeat: int):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(leafes)
+            durations.append(time.perf_counter() - start)
+        self.stdout.write(f"{label:<12} {min(durations) * 1000:>10.1f} ms")
+
+    def handle(self, *args, **options):
+        leafes = build_forest(options["size"], options["seed"])
+        self.stdout.write(f"{options['size']} goals in {len(leafes)} trees")
+        self.measure("recursive", render_recursive, leafes, options["repeat"])
+        self.measure("flat", render_flat, leafes, options["repeat"])
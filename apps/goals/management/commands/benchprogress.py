@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from apps.goals.models import Goal, GoalClosure, Link, ProgressMonitor
+from apps.users.models import CustomUser
+
+
+def build_graph(user: CustomUser, size: int, seed: int) -> list[Goal]:
+    rng = random.Random(seed)
+    goals = Goal.objects.bulk_create(
+        [Goal(user=user, name=f"Goal {i}") for i in range(size)]
+    )
+    parents: dict[int, int] = {}
+    for i in range(1, size):
+        parents[i] = rng.randrange(max(0, i - 50), i)
+    Link.objects.bulk_create(
+        [Link(master_goal=goals[p], sub_goal=goals[i]) for i, p in parents.items()]
+    )
+    closures = []
+    for i in range(1, size):
+        p: int | None = parents[i]
+        while p is not None:
+            closures.append(GoalClosure(ancestor=goals[p], descendant=goals[i]))
+            p = parents.get(p)
+    GoalClosure.objects.bulk_create(closures, batch_size=5000)
+    ProgressMonitor.objects.bulk_create(
+        [
+            ProgressMonitor(goal=g, name="m", steps=10, step=rng.randint(0, 10))
+            for g in goals
+            if rng.random() < 0.5
+        ]
+    )
+    return goals
+
+
+def add_monitor(goal: Goal, step: int):
+    # bulk_create skips ProgressMonitor.save so nothing is propagated yet
+    ProgressMonitor.objects.bulk_create(
+        [ProgressMonitor(goal=goal, name="m", steps=10, step=step, weight=50)]
+    )
+
+
+def reset_walk(goal: Goal | None):
+    # the per ancestor walk that Goal.reset used to do
+    while goal is not None:
+        goal.progress = goal.get_progress_calc()
+        Goal.objects.filter(pk=goal.pk).update(progress=goal.progress)
+        goal = goal.master_goals.first()
+
+
+class Command(BaseCommand):
+    help = "Benchmark the goal progress recomputation on a synthetic goal graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def measure(self, label: str, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            duration = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<32} {duration * 1000:>10.1f} ms {len(ctx.captured_queries):>7} queries"
+        )
+
+    def handle(self, *args, **options):
+        size = options["size"]
+        with transaction.atomic():
+            user = CustomUser.objects.create(email="benchprogress@localhost")
+            goals = build_graph(user, size, options["seed"])
+            pks = [g.pk for g in goals]
+            deepest_pk, depth = (
+                GoalClosure.objects.values_list("descendant")
+                .annotate(depth=Count("pk"))
+                .order_by("-depth")
+                .first()
+            )
+            deepest = Goal.objects.get(pk=deepest_pk)
+            self.stdout.write(f"{size} goals, deepest goal has {depth} ancestors")
+
+            self.measure("engine: all goals", lambda: Goal.recompute_progress(pks))
+            add_monitor(deepest, 3)
+            self.measure("engine: deepest goal", lambda: deepest.reset())
+            add_monitor(deepest, 7)
+            self.measure("reset walk: deepest goal", lambda: reset_walk(deepest))
+
+            for goal in Goal.objects.filter(pk__in=pks[:200]):
+                assert goal.progress == goal.get_progress_calc()
+            transaction.set_rollback(True)
@@ -0,0 +1,87 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:19
+
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def build_closure(apps, schema_editor):
+    """
+    Replay the links the way GoalClosure.add_link does, in memory. A link that
+    would close a cycle is left out of the closure and logged.
+    """
+    Link = apps.get_model("goals", "Link")
+    GoalClosure = apps.get_model("goals", "GoalClosure")
+    # descendants[a][d] and ancestors[d][a] are the paths from a to d
+    descendants: dict[int, dict[int, int]] = {}
+    ancestors: dict[int, dict[int, int]] = {}
+    links = Link.objects.order_by("pk").values_list("pk", "master_goal", "sub_goal")
+    for pk, master, sub in links:
+        above = {master: 1, **ancestors.get(master, {})}
+        below = {sub: 1, **descendants.get(sub, {})}
+        if master in below:
+            logger.warning("link %s from %s to %s closes a cycle", pk, master, sub)
+            continue
+        for a, a_paths in above.items():
+            for d, d_paths in below.items():
+                paths = descendants.setdefault(a, {}).get(d, 0) + a_paths * d_paths
+                descendants[a][d] = paths
+                ancestors.setdefault(d, {})[a] = paths
+    closures = [
+        GoalClosure(ancestor_id=a, descendant_id=d, paths=p)
+        for a, below in descendants.items()
+        for d, p in below.items()
+    ]
+    GoalClosure.objects.bulk_create(closures, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0005_alter_goal_id_alter_link_id_alter_progressmonitor_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoalClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("paths", models.PositiveIntegerField(default=1)),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_closures",
+                        to="goals.goal",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_closures",
+                        to="goals.goal",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"), name="unique_goal_closure"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0006_goalclosure"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(
+                fields=["user", "is_archived", "name"], name="goal_user_archived_idx"
+            ),
+        ),
+    ]
@@ -1,9 +1,36 @@
-from typing import TYPE_CHECKING
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from apps.users.models import CustomUser
 
+_progress = threading.local()
+
+
+@contextmanager
+def defer_progress():
+    """
+    Collect the goals whose progress needs to be recalculated instead of
+    recalculating them on every save. When the outermost block exits every
+    affected goal and master goal is recomputed exactly once.
+    """
+    if getattr(_progress, "pending", None) is not None:
+        yield
+        return
+    _progress.pending = set()
+    try:
+        yield
+    except BaseException:
+        _progress.pending = None
+        raise
+    pks, _progress.pending = _progress.pending, None
+    Goal.recompute_progress(pks)
+
 
 class Goal(models.Model):
     user = models.ForeignKey(CustomUser, related_name="goals", on_delete=models.CASCADE)
@@ -28,23 +55,32 @@ class Goal(models.Model):
         strategies: models.QuerySet["Strategy"]
         sub_links: models.QuerySet["Link"]
         master_links: models.QuerySet["Link"]
+        descendant_closures: models.QuerySet["GoalClosure"]
+        ancestor_closures: models.QuerySet["GoalClosure"]
 
     class Meta:
         ordering = ("is_archived", "name")
+        indexes = [
+            models.Index(
+                fields=["user", "is_archived", "name"], name="goal_user_archived_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        for goal in list(self.master_goals.all()):
-            goal.reset()
+        Goal.recompute_progress(self.master_goals.values_list("pk", flat=True))
 
     def delete(self, *args, **kwargs):
-        goals = list(self.master_goals.all())
-        ret = super().delete(*args, **kwargs)
-        for goal in goals:
-            goal.reset()
+        goals = list(self.master_goals.values_list("pk", flat=True))
+        links = Link.objects.filter(Q(master_goal=self) | Q(sub_goal=self))
+        with transaction.atomic():
+            for master_pk, sub_pk in links.values_list("master_goal", "sub_goal"):
+                GoalClosure.remove_link(master_pk, sub_pk)
+            ret = super().delete(*args, **kwargs)
+        Goal.recompute_progress(goals)
         return ret
 
     @property
@@ -85,28 +121,19 @@ class Goal(models.Model):
         return queryset
 
     def get_all_sub_goals(self):
-        query: models.QuerySet[Goal] = self.sub_goals.all()
-        for goal in self.sub_goals.all():
-            query = query | goal.get_all_sub_goals()
-        return query
+        return Goal.objects.filter(ancestor_closures__ancestor=self)
 
     def get_all_sub_monitors(self):
-        query = self.progress_monitors.all()
-        for goal in self.get_all_sub_goals():
-            query = query | goal.progress_monitors.all()
-        return query
+        sub_goals = self.descendant_closures.values("descendant")
+        return ProgressMonitor.objects.filter(Q(goal=self) | Q(goal__in=sub_goals))
 
     def get_all_sub_strategies(self):
-        query = self.strategies.all()
-        for goal in self.get_all_sub_goals():
-            query = query | goal.strategies.all()
-        return query
+        sub_goals = self.descendant_closures.values("descendant")
+        return Strategy.objects.filter(Q(goal=self) | Q(goal__in=sub_goals))
 
     def get_all_sub_links(self):
-        query = self.sub_links.all()
-        for goal in self.get_all_sub_goals():
-            query = query | goal.sub_links.all()
-        return query
+        sub_goals = self.descendant_closures.values("descendant")
+        return Link.objects.filter(Q(master_goal=self) | Q(master_goal__in=sub_goals))
 
     def get_all_master_objects(self):
         objects = list()
@@ -117,31 +144,98 @@ class Goal(models.Model):
         return objects
 
     def get_all_mastergoals(self):
-        query = self.master_goals.all()
-        for goal in self.master_goals.all():
-            query = query | goal.get_all_mastergoals()
-        return query
+        return Goal.objects.filter(descendant_closures__descendant=self)
 
-    def get_progress_calc(self):
+    @staticmethod
+    def calc_progress(items: Iterable[tuple[int, int]]) -> int:
         progress = 0
         weight = 0
 
-        for monitor in self.progress_monitors.all():
-            progress += monitor.progress * monitor.weight
-            weight += monitor.weight
-
-        for link in self.sub_links.all():
-            progress += link.progress * link.weight
-            weight += link.weight
+        for item_progress, item_weight in items:
+            progress += item_progress * item_weight
+            weight += item_weight
 
         if weight == 0:
             return 0
 
         return int(round(progress / weight))
 
+    def get_progress_calc(self):
+        items = [(m.progress, m.weight) for m in self.progress_monitors.all()]
+        items += [(link.progress, link.weight) for link in self.sub_links.all()]
+        return Goal.calc_progress(items)
+
+    @staticmethod
+    def recompute_progress(goal_pks: Iterable[int]) -> dict[int, int]:
+        """
+        Recalculate the progress of the given goals and of all their master goals
+        in one pass. The monitor and link rows are loaded up front, the goals are
+        computed bottom-up in topological order and only the goals whose progress
+        changed are written back with a single bulk update.
+        """
+        pks = set(goal_pks)
+        pending = getattr(_progress, "pending", None)
+        if pending is not None:
+            pending.update(pks)
+            return {}
+        if not pks:
+            return {}
+
+        above = GoalClosure.objects.filter(descendant__in=pks).values("ancestor")
+        goals = {
+            g.pk: g
+            for g in Goal.objects.filter(Q(pk__in=pks) | Q(pk__in=above)).only(
+                "progress"
+            )
+        }
+
+        items: dict[int, list[tuple[int, int]]] = {pk: [] for pk in goals}
+        monitors = ProgressMonitor.objects.filter(goal__in=goals.keys())
+        for goal, step, steps, weight in monitors.values_list(
+            "goal", "step", "steps", "weight"
+        ):
+            items[goal].append((ProgressMonitor.calc_progress(step, steps), weight))
+
+        sub_links: dict[int, list[tuple[int, int, int]]] = {pk: [] for pk in goals}
+        masters: dict[int, list[int]] = {pk: [] for pk in goals}
+        # the sub goals of every goal whose progress is not computed yet
+        waiting: dict[int, int] = {pk: 0 for pk in goals}
+        links = Link.objects.filter(master_goal__in=goals.keys())
+        for master, sub, weight, sub_progress in links.values_list(
+            "master_goal", "sub_goal", "weight", "sub_goal__progress"
+        ):
+            sub_links[master].append((sub, weight, sub_progress))
+            if sub in goals:
+                masters[sub].append(master)
+                waiting[master] += 1
+
+        progress: dict[int, int] = {}
+        queue = deque(pk for pk, count in waiting.items() if count == 0)
+        while queue:
+            pk = queue.popleft()
+            link_items = [(progress.get(s, p), w) for s, w, p in sub_links[pk]]
+            progress[pk] = Goal.calc_progress(items[pk] + link_items)
+            for master in masters[pk]:
+                waiting[master] -= 1
+                if waiting[master] == 0:
+                    queue.append(master)
+
+        now = timezone.now()
+        changed: list[Goal] = []
+        for pk, value in progress.items():
+            goal = goals[pk]
+            if goal.progress != value:
+                goal.progress = value
+                goal.updated = now
+                changed.append(goal)
+        if changed:
+            with transaction.atomic():
+                Goal.objects.bulk_update(changed, ["progress", "updated"])
+        return progress
+
     def reset(self):
-        self.progress = self.get_progress_calc()
-        self.save()
+        progress = Goal.recompute_progress([self.pk])
+        self.progress = progress.get(self.pk, self.progress)
 
 
 class ProgressMonitor(models.Model):
@@ -158,13 +252,13 @@ class ProgressMonitor(models.Model):
     updated = models.DateTimeField(auto_now=True, null=True)
 
     # general
+    @staticmethod
+    def calc_progress(step: int, steps: int) -> int:
+        return round((float(step) / float(steps)) * 100) if steps != 0 else 100
+
     @property
     def progress(self):
-        return (
-            round((float(self.step) / float(self.steps)) * 100)
-            if self.steps != 0
-            else 100
-        )
+        return ProgressMonitor.calc_progress(self.step, self.steps)
 
     @property
     def progress_str(self):
@@ -184,7 +278,7 @@ class ProgressMonitor(models.Model):
             update_fields=update_fields,
         )
         # calculate the goals progress
-        self.goal.reset()
+        Goal.recompute_progress([self.goal_id])
 
     class Meta:
         ordering = ("is_archived", "name", "goal")
@@ -193,11 +287,11 @@ class ProgressMonitor(models.Model):
         return self.name
 
     def delete(self, using=None, keep_parents=False):
-        goal = self.goal
+        goal_pk = self.goal_id
         ret = super(ProgressMonitor, self).delete(
             using=using, keep_parents=keep_parents
         )
-        goal.reset()
+        Goal.recompute_progress([goal_pk])
         return ret
 
     # getters
@@ -269,21 +363,64 @@ class Link(models.Model):
     def save(
         self, force_insert=False, force_update=False, using=None, update_fields=None
     ):
-        super().save(
-            force_insert=force_insert,
-            force_update=force_update,
-            using=using,
-            update_fields=update_fields,
-        )
+        old = None
+        if not self._state.adding:
+            old = (
+                Link.objects.filter(pk=self.pk)
+                .values_list("master_goal", "sub_goal")
+                .first()
+            )
+        new = (self.master_goal_id, self.sub_goal_id)
+        with transaction.atomic():
+            # keep the closure table in sync before the link row changes
+            if old is not None and old != new:
+                GoalClosure.remove_link(*old)
+            if old != new:
+                GoalClosure.add_link(*new)
+            super().save(
+                force_insert=force_insert,
+                force_update=force_update,
+                using=using,
+                update_fields=update_fields,
+            )
         # reset the master goal progress
-        self.master_goal.reset()
+        Goal.recompute_progress([self.master_goal_id])
 
     def delete(self, using=None, keep_parents=False):
-        master_goal = self.master_goal
-        ret = super(Link, self).delete(using=using, keep_parents=keep_parents)
-        master_goal.reset()
+        master_goal_pk = self.master_goal_id
+        with transaction.atomic():
+            GoalClosure.remove_link(self.master_goal_id, self.sub_goal_id)
+            ret = super(Link, self).delete(using=using, keep_parents=keep_parents)
+        Goal.recompute_progress([master_goal_pk])
         return ret
 
+    @staticmethod
+    def relink(sub_goal: Goal, master_pks: Iterable[int]) -> tuple[set[int], set[int]]:
+        """
+        Make `master_pks` the master goals of `sub_goal`. Only the links that
+        differ from the stored ones are deleted or created, each in one bulk
+        query, and the old and new master goals are recomputed together. Returns
+        the removed and the added master goal pks.
+        """
+        current = set(
+            Link.objects.filter(sub_goal=sub_goal).values_list("master_goal", flat=True)
+        )
+        wanted = set(master_pks)
+        removed, added = current - wanted, wanted - current
+        if not removed and not added:
+            return removed, added
+        with transaction.atomic():
+            for master_pk in removed:
+                GoalClosure.remove_link(master_pk, sub_goal.pk)
+            Link.objects.filter(sub_goal=sub_goal, master_goal__in=removed).delete()
+            for master_pk in added:
+                GoalClosure.add_link(master_pk, sub_goal.pk)
+            Link.objects.bulk_create(
+                [Link(master_goal_id=pk, sub_goal=sub_goal) for pk in added]
+            )
+        Goal.recompute_progress(removed | added)
+        return removed, added
+
     # getters
     @staticmethod
     def get_links(links, include_archived_links=False):
@@ -305,9 +442,10 @@ class Link(models.Model):
         return objects
 
     def get_all_sub_goals(self):
-        query = Goal.objects.filter(pk=self.sub_goal.pk)
-        query = query | self.sub_goal.get_all_sub_goals()
-        return query
+        sub_goals = GoalClosure.objects.filter(ancestor=self.sub_goal_id)
+        return Goal.objects.filter(
+            Q(pk=self.sub_goal_id) | Q(pk__in=sub_goals.values("descendant"))
+        )
 
     def get_all_sub_strategies(self):
         return self.sub_goal.get_all_sub_strategies()
@@ -322,6 +460,91 @@ class Link(models.Model):
         return self.master_goal.name + " --> " + self.sub_goal.name
 
 
+class GoalClosure(models.Model):
+    """
+    Materialized transitive closure of the goal links. There is one row for every
+    pair of goals where `descendant` can be reached from `ancestor` by following
+    one or more links. `paths` counts the distinct routes so that removing one
+    link of a diamond does not drop a pair that is still reachable.
+    """
+
+    ancestor = models.ForeignKey(
+        Goal, on_delete=models.CASCADE, related_name="descendant_closures"
+    )
+    descendant = models.ForeignKey(
+        Goal, on_delete=models.CASCADE, related_name="ancestor_closures"
+    )
+    paths = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="unique_goal_closure"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} --> {self.descendant_id}"
+
+    @staticmethod
+    def get_paths(master_pk: int, sub_pk: int):
+        ancestors = {master_pk: 1}
+        ancestors.update(
+            GoalClosure.objects.filter(descendant=master_pk).values_list(
+                "ancestor", "paths"
+            )
+        )
+        descendants = {sub_pk: 1}
+        descendants.update(
+            GoalClosure.objects.filter(ancestor=sub_pk).values_list(
+                "descendant", "paths"
+            )
+        )
+        return ancestors, descendants
+
+    @staticmethod
+    def change_link(master_pk: int, sub_pk: int, sign: int):
+        ancestors, descendants = GoalClosure.get_paths(master_pk, sub_pk)
+        if sign > 0 and master_pk in descendants:
+            raise ValueError(
+                f"Linking goal {master_pk} to {sub_pk} would create a cycle."
+            )
+        existing = {
+            (c.ancestor_id, c.descendant_id): c
+            for c in GoalClosure.objects.filter(
+                ancestor__in=ancestors.keys(), descendant__in=descendants.keys()
+            )
+        }
+        create: list[GoalClosure] = []
+        update: list[GoalClosure] = []
+        delete: list[int] = []
+        for a, a_paths in ancestors.items():
+            for d, d_paths in descendants.items():
+                paths = sign * a_paths * d_paths
+                closure = existing.get((a, d))
+                if closure is None:
+                    if paths > 0:
+                        create.append(
+                            GoalClosure(ancestor_id=a, descendant_id=d, paths=paths)
+                        )
+                elif closure.paths + paths > 0:
+                    closure.paths += paths
+                    update.append(closure)
+                else:
+                    delete.append(closure.pk)
+        GoalClosure.objects.bulk_create(create)
+        GoalClosure.objects.bulk_update(update, ["paths"])
+        GoalClosure.objects.filter(pk__in=delete).delete()
+
+    @staticmethod
+    def add_link(master_pk: int, sub_pk: int):
+        GoalClosure.change_link(master_pk, sub_pk, 1)
+
+    @staticmethod
+    def remove_link(master_pk: int, sub_pk: int):
+        GoalClosure.change_link(master_pk, sub_pk, -1)
+
+
 class Strategy(models.Model):
     name = models.CharField(max_length=300)
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name="strategies")
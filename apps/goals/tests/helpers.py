@@ -0,0 +1,16 @@
+from apps.goals.models import Goal, Link
+from apps.users.models import CustomUser
+
+
+def create_goal(user: CustomUser, name="Goal", parent: Goal | None = None) -> Goal:
+    goal = Goal.objects.create(user=user, name=name)
+    if parent:
+        Link.objects.create(master_goal=parent, sub_goal=goal)
+    return goal
+
+
+def create_chain(user: CustomUser, length: int) -> list[Goal]:
+    goals = [create_goal(user, name="Goal 0")]
+    for i in range(1, length):
+        goals.append(create_goal(user, name=f"Goal {i}", parent=goals[-1]))
+    return goals
@@ -0,0 +1,87 @@
+import importlib
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.goals.models import GoalClosure, Link, ProgressMonitor
+from apps.goals.tests import helpers
+from apps.users.tests.helpers import create_user
+
+
+def test_closure_follows_links(db):
+    user = create_user(save=True)
+    a, b, c = helpers.create_chain(user, 3)
+    d = helpers.create_goal(user, "d", parent=a)
+
+    assert set(a.get_all_sub_goals()) == {b, c, d}
+    assert set(b.get_all_sub_goals()) == {c}
+    assert set(c.get_all_mastergoals()) == {a, b}
+    assert set(Link.objects.get(sub_goal=b).get_all_sub_goals()) == {b, c}
+
+
+def test_closure_after_unlink_and_delete(db):
+    user = create_user(save=True)
+    a, b, c, d = helpers.create_chain(user, 4)
+
+    Link.objects.get(sub_goal=c).delete()
+    assert set(a.get_all_sub_goals()) == {b}
+    assert set(d.get_all_mastergoals()) == {c}
+
+    Link.objects.create(master_goal=b, sub_goal=c)
+    b.delete()
+    assert set(a.get_all_sub_goals()) == set()
+    assert set(c.get_all_sub_goals()) == {d}
+    assert not GoalClosure.objects.filter(ancestor=a).exists()
+
+
+def test_closure_rejects_cycles(db):
+    user = create_user(save=True)
+    a, b, c = helpers.create_chain(user, 3)
+    link = Link.objects.get(sub_goal=b)
+    link.master_goal = c
+    with pytest.raises(ValueError):
+        link.save()
+    assert set(a.get_all_sub_goals()) == {b, c}
+
+
+def test_sub_objects_are_a_single_query(db):
+    user = create_user(save=True)
+    goals = helpers.create_chain(user, 30)
+    for goal in goals:
+        ProgressMonitor.objects.create(goal=goal, name=goal.name, steps=1)
+    root = goals[0]
+
+    for fn in [
+        root.get_all_sub_goals,
+        root.get_all_sub_monitors,
+        root.get_all_sub_links,
+        root.get_all_sub_strategies,
+        goals[-1].get_all_mastergoals,
+    ]:
+        with CaptureQueriesContext(connection) as ctx:
+            list(fn())
+        assert len(ctx.captured_queries) == 1
+
+    assert len(root.get_all_sub_monitors()) == 30
+    assert len(root.get_all_sub_links()) == 29
+
+
+def test_migration_builds_the_same_closure(db, caplog):
+    user = create_user(save=True)
+    a, b, c, d = helpers.create_chain(user, 4)
+    e = helpers.create_goal(user, "e", parent=b)
+    x, y = helpers.create_chain(user, 2)
+    closure = set(GoalClosure.objects.values_list("ancestor", "descendant", "paths"))
+    # legacy data can contain a cycle, bulk_create skips the check of save
+    Link.objects.bulk_create([Link(master_goal=y, sub_goal=x)])
+    GoalClosure.objects.all().delete()
+    migration = importlib.import_module("apps.goals.migrations.0006_goalclosure")
+
+    migration.build_closure(apps, None)
+
+    rebuilt = set(GoalClosure.objects.values_list("ancestor", "descendant", "paths"))
+    assert rebuilt == closure
+    assert (a.pk, d.pk, 1) in rebuilt and (a.pk, e.pk, 1) in rebuilt
+    assert "closes a cycle" in caplog.text
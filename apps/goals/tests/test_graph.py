@@ -0,0 +1,38 @@
+from django.test import Client
+from django.urls import reverse
+
+from apps.goals.graph import GoalGraph
+from apps.goals.models import Link
+from apps.goals.tests import helpers
+from apps.users.tests.helpers import create_user
+
+
+def test_find_cycle():
+    graph = GoalGraph([(1, 2), (2, 3), (1, 4)])
+
+    assert graph.find_cycle([(3, 1)]) == (3, 1)
+    assert graph.find_cycle([(4, 2)]) is None
+    assert graph.find_cycle([(2, 2)]) == (2, 2)
+    assert graph.find_cycle([(3, 5), (5, 2)]) == (5, 2)
+    assert graph.find_cycle([(3, 1)], remove=[(1, 2)]) is None
+    # the graph is unchanged after a check
+    assert graph.get_descendants(1) == {2, 3, 4}
+
+
+def test_update_goal_rejects_cycles(db):
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    a, b, d = helpers.create_chain(user, 3)
+    other = helpers.create_goal(user, "other")
+    url = reverse("form", args=["UpdateGoal"]) + f"?pk={b.pk}"
+
+    response = c.post(url, {"name": b.name, "parents": [other.pk, d.pk]})
+    assert "Recursive relationship" in response.content.decode()
+
+    response = c.post(url, {"name": b.name, "parents": [b.pk]})
+    assert "Goal can not have itself as parent." in response.content.decode()
+
+    response = c.post(url, {"name": b.name, "parents": [other.pk]})
+    assert response.status_code == 302
+    assert Link.objects.get(sub_goal=b).master_goal == other
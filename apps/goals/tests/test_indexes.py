@@ -0,0 +1,21 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.goals.tests import helpers
+from apps.todos.tests.helpers import get_query_plans
+from apps.users.tests.helpers import create_user
+
+
+def test_goal_views_use_indexes(db):
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    goals = helpers.create_chain(user, 3)
+
+    for url in [reverse("goals"), reverse("goal", args=[goals[0].pk])]:
+        with CaptureQueriesContext(connection) as ctx:
+            assert c.get(url).status_code == 200
+        plans = "\n".join(get_query_plans(ctx.captured_queries))
+        assert "goals_goal USING INDEX goal_user_archived_idx" in plans
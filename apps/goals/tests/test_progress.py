@@ -0,0 +1,66 @@
+import random
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.goals.models import Goal, ProgressMonitor, defer_progress
+from apps.goals.tests import helpers
+from apps.users.tests.helpers import create_user
+
+
+def test_progress_matches_get_progress_calc(db):
+    user = create_user(save=True)
+    rng = random.Random(7)
+    goals = [helpers.create_goal(user, "root")]
+    for i in range(40):
+        goals.append(helpers.create_goal(user, f"g{i}", parent=rng.choice(goals)))
+    for goal in rng.sample(goals, 25):
+        steps = rng.randint(0, 5)
+        ProgressMonitor.objects.create(
+            goal=goal,
+            name="m",
+            steps=steps,
+            step=rng.randint(0, steps),
+            weight=rng.randint(1, 3),
+        )
+
+    progress = Goal.recompute_progress(g.pk for g in goals)
+
+    for goal in Goal.objects.all():
+        assert goal.progress == goal.get_progress_calc()
+        assert progress[goal.pk] == goal.progress
+    assert goals[0].get_progress_calc() > 0
+
+
+def test_monitor_save_propagates_with_constant_queries(db):
+    user = create_user(save=True)
+    goals = helpers.create_chain(user, 25)
+    monitor = ProgressMonitor.objects.create(goal=goals[-1], name="m", steps=4)
+
+    monitor.step = 1
+    with CaptureQueriesContext(connection) as ctx:
+        monitor.save()
+    assert len(ctx.captured_queries) <= 8
+
+    for goal in Goal.objects.all():
+        assert goal.progress == 25
+
+
+def test_deferred_progress_is_computed_once(db):
+    user = create_user(save=True)
+    goals = helpers.create_chain(user, 10)
+    monitors = [
+        ProgressMonitor.objects.create(goal=goal, name="m", steps=2) for goal in goals
+    ]
+
+    with CaptureQueriesContext(connection) as ctx:
+        with defer_progress():
+            for monitor in monitors:
+                monitor.step = 2
+                monitor.save()
+            assert Goal.objects.get(pk=goals[0].pk).progress == 0
+    updates = [q for q in ctx.captured_queries if 'UPDATE "goals_goal"' in q["sql"]]
+    assert len(updates) == 1
+
+    for goal in Goal.objects.all():
+        assert goal.progress == 100
@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.goals.models import Goal, GoalClosure, Link, ProgressMonitor
+from apps.goals.tests import helpers
+from apps.users.tests.helpers import create_user
+
+
+def get_link_writes(queries: list[dict]) -> list[str]:
+    return [
+        q["sql"]
+        for q in queries
+        if '"goals_link"' in q["sql"] and not q["sql"].startswith("SELECT")
+    ]
+
+
+def test_relink(db):
+    user = create_user(save=True)
+    a, b = helpers.create_goal(user, "a"), helpers.create_goal(user, "b")
+    goal = helpers.create_goal(user, "goal", parent=a)
+    ProgressMonitor.objects.create(goal=goal, name="m", steps=2, step=2)
+    a.refresh_from_db()
+    assert a.progress == 100
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert Link.relink(goal, [a.pk]) == (set(), set())
+    assert get_link_writes(ctx.captured_queries) == []
+
+    assert Link.relink(goal, [b.pk]) == ({a.pk}, {b.pk})
+    assert list(goal.master_goals.all()) == [b]
+    assert not GoalClosure.objects.filter(ancestor=a, descendant=goal).exists()
+    assert GoalClosure.objects.filter(ancestor=b, descendant=goal).exists()
+    progress = dict(Goal.objects.values_list("name", "progress"))
+    assert progress["a"] == 0
+    assert progress["b"] == 100
+
+
+def test_update_goal_unchanged_parents(db):
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    parent, goal = helpers.create_chain(user, 2)
+    url = reverse("form", args=["UpdateGoal"]) + f"?pk={goal.pk}"
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = c.post(url, {"name": "renamed", "parents": [parent.pk]})
+    assert response.status_code == 302
+    assert get_link_writes(ctx.captured_queries) == []
+    goal.refresh_from_db()
+    assert goal.name == "renamed"
+    assert list(goal.master_goals.all()) == [parent]
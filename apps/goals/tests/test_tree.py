@@ -0,0 +1,92 @@
+import re
+
+from django.test import Client
+from django.urls import reverse
+
+from apps.goals.management.commands.benchgoaltree import (
+    build_forest,
+    render_flat,
+    render_recursive,
+)
+from apps.goals.models import Goal, Link
+from apps.goals.tests import helpers
+from apps.goals.views import Leaf, LeafBuilder
+from apps.users.tests.helpers import create_user
+
+
+def flatten(leafes: list[Leaf], depth=0) -> list[tuple[int, str]]:
+    ret = []
+    for leaf in leafes:
+        ret.append((depth, leaf.goal.name))
+        ret += flatten(leaf.children, depth + 1)
+    return ret
+
+
+def test_tree_is_built_with_two_queries(db, django_assert_num_queries):
+    user = create_user(save=True)
+    root = helpers.create_goal(user, "root")
+    for i in range(20):
+        chain = helpers.create_chain(user, 10)
+        Link.objects.create(master_goal=root, sub_goal=chain[0])
+    helpers.create_goal(user, "zzz")
+
+    with django_assert_num_queries(2):
+        leafes = Leaf.build(user)
+
+    tree = flatten(leafes)
+    assert len(tree) == 202
+    assert tree[0] == (0, "root")
+    assert tree[-1] == (0, "zzz")
+    assert max(depth for depth, _ in tree) == 10
+
+
+def test_tree_hides_archived_goals(db):
+    user = create_user(save=True)
+    a, b, c = helpers.create_chain(user, 3)
+    b.is_archived = True
+    b.save()
+
+    assert flatten(Leaf.build(user)) == [(0, a.name)]
+    user.show_archived_objects = True
+    assert len(flatten(Leaf.build(user))) == 3
+
+
+def test_archived_goal_shows_its_children(db):
+    user = create_user(save=True, password="pass1234!")
+    a, b, c = helpers.create_chain(user, 3)
+    a.is_archived = True
+    a.save()
+    client = Client()
+    client.login(email=user.email, password="pass1234!")
+
+    response = client.get(reverse("goal", args=[a.pk]))
+    assert response.status_code == 200
+    assert [row.goal for row in response.context["rows"]] == [b, c]
+
+
+def test_tree_breaks_cycles(db):
+    user = create_user(save=True)
+    a, b, c = helpers.create_chain(user, 3)
+    d = Goal.objects.create(user=user, name="d")
+    e = Goal.objects.create(user=user, name="e")
+    # bulk_create skips the cycle check of Link.save
+    Link.objects.bulk_create(
+        [Link(master_goal=d, sub_goal=e), Link(master_goal=e, sub_goal=d)]
+    )
+
+    builder = LeafBuilder(user)
+    tree = flatten(builder.build())
+
+    assert tree == [(0, "Goal 0"), (1, "Goal 1"), (2, "Goal 2"), (0, "d"), (1, "e")]
+    assert builder.cycles == [(e.pk, d.pk)]
+    assert builder.duplicates == []
+
+
+def test_flat_template_matches_recursive_include(db):
+    leafes = build_forest(300, seed=3)
+
+    def normalize(html: str) -> str:
+        return re.sub(r"\s+", "", html)
+
+    assert normalize(render_flat(leafes)) == normalize(render_recursive(leafes))
+    assert normalize(render_flat([])) == ""
@@ -1,7 +1,7 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
-from apps.goals.models import Goal
+from apps.goals.models import Goal, Link
 from apps.users.models import CustomUser
 from apps.utils.functional import list_filter, list_map
 
@@ -18,60 +18,144 @@ class Leaf:
         return s
 
     @staticmethod
-    def build_goals_data(user: CustomUser):
-        goals_qs = Goal.objects.filter(user=user).prefetch_related(
-            "master_goals", "sub_goals"
-        )
+    def build(user: CustomUser) -> list["Leaf"]:
+        return LeafBuilder(user).build()
+
+    @staticmethod
+    def flatten(leafes: list["Leaf"]) -> list["Row"]:
+        rows: list[Row] = []
+        stack = [(leaf, 0, i == 0) for i, leaf in enumerate(leafes)][::-1]
+        while stack:
+            leaf, depth, opens = stack.pop()
+            rows.append(Row(leaf.goal, depth, opens, len(leaf.children) > 0))
+            children = [(c, depth + 1, i == 0) for i, c in enumerate(leaf.children)]
+            stack += children[::-1]
+        for i, row in enumerate(rows):
+            if not row.has_children:
+                next_depth = rows[i + 1].depth if i + 1 < len(rows) else 0
+                row.closes = range(row.depth - next_depth)
+        if rows:
+            rows[-1].last = True
+        return rows
+
+
+class Row:
+    """
+    One goal of the pre-ordered goal tree. The template opens a nested list
+    before the row if `opens` is set and closes `closes` levels after it.
+    """
+
+    def __init__(self, goal: Goal, depth: int, opens: bool, has_children: bool):
+        self.goal = goal
+        self.depth = depth
+        self.opens = opens
+        self.has_children = has_children
+        self.closes = range(0)
+        self.last = False
+
+
+class LeafBuilder:
+    """
+    Builds the goal forest of a user from two queries, one for the goals and one
+    for the links. The tree is walked iteratively, links that would close a cycle
+    are collected in `cycles` and goals that are reached a second time are
+    collected in `duplicates` instead of being rendered again.
+    """
+
+    def __init__(self, user: CustomUser):
+        goals_qs = Goal.objects.filter(user=user)
         if not user.show_archived_objects:
             goals_qs = goals_qs.filter(is_archived=False)
-        goals_list = list(goals_qs)
-        goals_dict = {g.pk: g for g in goals_list}
-        return goals_dict, goals_list
+        self.goals = list(goals_qs)
+        self.goals_dict = {g.pk: g for g in self.goals}
 
-    @staticmethod
-    def build(user: CustomUser) -> list["Leaf"]:
-        goals_dict, goals_list = Leaf.build_goals_data(user)
-        root_goals = list_filter(goals_list, lambda g: len(g.master_goals.all()) == 0)
-        root = list_map(root_goals, lambda g: Leaf.build_leaf(g, goals_dict))
-        return root
+        self.parents: dict[int, list[int]] = {}
+        links = Link.objects.filter(sub_goal__user=user).order_by()
+        for master, sub in links.values_list("master_goal", "sub_goal"):
+            self.parents.setdefault(sub, []).append(master)
 
-    @staticmethod
-    def build_leaf(goal: Goal, goals_dict: dict[int, Goal]):
-        children = Leaf.build_children(goal, goals_dict)
-        return Leaf(goal=goal, children=list(children))
+        # iterate the ordered goals so that the children keep the goal ordering
+        self.children: dict[int, list[Goal]] = {pk: [] for pk in self.goals_dict}
+        for goal in self.goals:
+            for parent in self.parents.get(goal.pk, []):
+                if parent in self.children:
+                    self.children[parent].append(goal)
 
-    @staticmethod
-    def build_children(goal: Goal, goals_dict: dict[int, Goal]):
-        goals_qs = goal.sub_goals.all()
-        goals_pks = list_map(goals_qs, lambda g: g.pk)
-        for pk in goals_pks:
-            if pk in goals_dict:
-                goal = goals_dict[pk]
-                yield Leaf.build_leaf(goal, goals_dict)
+        self.visited: set[int] = set()
+        self.cycles: list[tuple[int, int]] = []
+        self.duplicates: list[int] = []
+
+    def get_parents(self, goal: Goal) -> list[Goal]:
+        parents = self.parents.get(goal.pk, [])
+        return [self.goals_dict[pk] for pk in parents if pk in self.goals_dict]
+
+    def build_leaf(self, goal: Goal) -> Leaf:
+        if goal.pk not in self.children:
+            # a hidden archived goal that is opened directly keeps its children
+            self.children[goal.pk] = list_filter(
+                self.goals, lambda g: goal.pk in self.parents.get(g.pk, [])
+            )
+        root = Leaf(goal=goal, children=[])
+        self.visited.add(goal.pk)
+        path = {goal.pk}
+        stack = [(root, iter(self.children.get(goal.pk, [])))]
+        while stack:
+            leaf, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                path.discard(leaf.goal.pk)
+                continue
+            if child.pk in path:
+                self.cycles.append((leaf.goal.pk, child.pk))
+                continue
+            if child.pk in self.visited:
+                self.duplicates.append(child.pk)
+                continue
+            self.visited.add(child.pk)
+            path.add(child.pk)
+            child_leaf = Leaf(goal=child, children=[])
+            leaf.children.append(child_leaf)
+            stack.append((child_leaf, iter(self.children[child.pk])))
+        return root
+
+    def build(self) -> list[Leaf]:
+        roots = list_filter(self.goals, lambda g: g.pk not in self.parents)
+        leafes = list_map(roots, self.build_leaf)
+        # goals inside a cycle have no root, start from the first one that is
+        # not hidden behind an archived master goal
+        for goal in self.goals:
+            if goal.pk in self.visited:
+                continue
+            if all(pk in self.goals_dict for pk in self.parents[goal.pk]):
+                leafes.append(self.build_leaf(goal))
+        return leafes
 
 
 @login_required
 def goals(request):
     assert isinstance(request.user, CustomUser)
-    leafes = Leaf.build(request.user)
-    return render(request, "goals/goals.html", {"leafes": leafes})
+    rows = Leaf.flatten(Leaf.build(request.user))
+    return render(request, "goals/goals.html", {"rows": rows})
 
 
 @login_required
 def goal(request, pk: int):
-    goal = (
-        Goal.objects.filter(user=request.user)
-        .prefetch_related("sub_goals", "master_goals")
-        .get(pk=pk)
-    )
-    goals_dict, _ = Leaf.build_goals_data(request.user)
-    children = list(Leaf.build_children(goal, goals_dict))
+    assert isinstance(request.user, CustomUser)
+    goal = Goal.objects.filter(user=request.user).get(pk=pk)
+    builder = LeafBuilder(request.user)
+    children = builder.build_leaf(goal).children
+    rows = Leaf.flatten(children)
     monitors = goal.progress_monitors.all()
-    parents_pks = list_map(goal.master_goals.all(), lambda g: g.pk)
-    parents_maybe = list_map(parents_pks, lambda pk: goals_dict.get(pk))
-    parents = list_filter(parents_maybe, lambda p: p is not None)
+    parents = builder.get_parents(goal)
     return render(
         request,
         "goals/goal.html",
-        {"goal": goal, "children": children, "monitors": monitors, "parents": parents},
+        {
+            "goal": goal,
+            "children": children,
+            "rows": rows,
+            "monitors": monitors,
+            "parents": parents,
+        },
     )
@@ -1,5 +1,10 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class NotesConfig(AppConfig):
+class NotesConfig(FormsConfig):
     name = "apps.notes"
+    forms = [
+        "apps.notes.forms.CreateNote",
+        "apps.notes.forms.UpdateNote",
+        "apps.notes.forms.DeleteNote",
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:09
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+def get_title(content: str) -> str:
+    # frozen copy of apps.notes.models.get_title
+    return strip_tags(content.split("</", 1)[0])[:200]
+
+
+def set_titles(apps, schema_editor):
+    Note = apps.get_model("notes", "Note")
+    notes = []
+    for note in Note.objects.only("pk", "content").iterator(chunk_size=500):
+        # only the titles are kept, not the content of every note
+        notes.append(Note(pk=note.pk, title=get_title(note.content)))
+    # bulk_update does not touch the auto_now updated field
+    Note.objects.bulk_update(notes, ["title"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0007_alter_note_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="title",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(set_titles, migrations.RunPython.noop),
+    ]
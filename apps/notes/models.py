@@ -5,9 +5,15 @@ from tinymce.models import HTMLField
 from apps.users.models import CustomUser
 
 
+def get_title(content: str) -> str:
+    # the text of the first element, usually the heading of the note
+    return strip_tags(content.split("</", 1)[0])[:200]
+
+
 class Note(models.Model):
     user = models.ForeignKey(CustomUser, related_name="notes", on_delete=models.CASCADE)
     content = HTMLField()
+    title = models.CharField(max_length=200, blank=True, editable=False)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
@@ -16,7 +22,7 @@ class Note(models.Model):
 
     @property
     def name(self):
-        return strip_tags(self.content.split("</", 1)[0])
+        return self.title
 
     @property
     def last_update_str(self):
@@ -24,3 +30,10 @@ class Note(models.Model):
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.title = get_title(self.content)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "title"}
+        return super().save(*args, **kwargs)
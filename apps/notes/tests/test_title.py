@@ -0,0 +1,68 @@
+import importlib
+
+from django.apps import apps
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.notes.models import Note
+from apps.users.tests.helpers import create_user
+
+CONTENT = "<h1>Title &amp; more</h1><p>" + "text " * 2000 + "</p>"
+
+
+def get_client(user) -> Client:
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    return c
+
+
+def test_title_is_kept_up_to_date(db):
+    user = create_user(save=True, password="pass1234!")
+    note = Note.objects.create(user=user, content=CONTENT)
+    assert note.title == "Title &amp; more"
+
+    url = reverse("form", args=["UpdateNote"]) + f"?pk={note.pk}&success=/"
+    get_client(user).post(url, {"content": "<p>Other</p>"})
+    assert Note.objects.get().title == "Other"
+
+    note.content = "<h2>Partial</h2>"
+    note.save(update_fields=["content"])
+    assert Note.objects.get().title == "Partial"
+
+
+def test_titles_are_backfilled(db):
+    user = create_user(save=True)
+    Note.objects.bulk_create([Note(user=user, content=CONTENT) for _ in range(3)])
+    migration = importlib.import_module("apps.notes.migrations.0008_title")
+
+    migration.set_titles(apps, None)
+
+    assert set(Note.objects.values_list("title", flat=True)) == {"Title &amp; more"}
+
+
+def test_notes_list_does_not_load_the_content(db):
+    user = create_user(save=True, password="pass1234!")
+    for i in range(20):
+        Note.objects.create(user=user, content=f"<h1>Note {i}</h1>{CONTENT}")
+    c = get_client(user)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = c.get(reverse("notes"))
+
+    assert response.status_code == 200
+    assert b"Note 0" in response.content and b"Note 19" in response.content
+    assert b"text text" not in response.content
+    notes = [q["sql"] for q in ctx.captured_queries if "notes_note" in q["sql"]]
+    assert len(notes) == 1 and '"content"' not in notes[0]
+
+
+def test_note_content(db):
+    user = create_user(save=True, password="pass1234!")
+    note = Note.objects.create(user=user, content=CONTENT)
+    url = reverse("note_content", args=[note.pk])
+
+    assert get_client(user).get(url).content.decode() == CONTENT
+    other = create_user(email="other@abc.de", save=True, password="pass1234!")
+    assert get_client(other).get(url).status_code == 404
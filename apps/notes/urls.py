@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     path("notes/", views.notes, name="notes"),
+    path("note/<int:pk>/content/", views.note_content, name="note_content"),
 ]
@@ -1,11 +1,18 @@
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest
-from django.shortcuts import render
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404, render
 
 from apps.notes.models import Note
 
 
 @login_required
 def notes(request: HttpRequest):
-    context = {"notes": Note.objects.filter(user=request.user)}
-    return render(request, "notes/notes.html", context)
+    # the content is loaded when a note is opened
+    notes = Note.objects.filter(user=request.user).only("pk", "title", "updated")
+    return render(request, "notes/notes.html", {"notes": notes})
+
+
+@login_required
+def note_content(request: HttpRequest, pk: int):
+    note = get_object_or_404(Note.objects.only("content"), pk=pk, user=request.user)
+    return HttpResponse(note.content)
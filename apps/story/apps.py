@@ -1,5 +1,8 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class StoryConfig(AppConfig):
+class StoryConfig(FormsConfig):
     name = "apps.story"
+    forms = [
+        "apps.story.forms.UpdateStory",
+    ]
@@ -1,5 +1,24 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class TodosConfig(AppConfig):
+class TodosConfig(FormsConfig):
     name = "apps.todos"
+    forms = [
+        "apps.todos.forms.CreateTodoFast",
+        "apps.todos.forms.CreateNormalTodo",
+        "apps.todos.forms.UpdateNormalTodo",
+        "apps.todos.forms.UpdateNeverEndingTodo",
+        "apps.todos.forms.DeleteTodo",
+        "apps.todos.forms.ToggleTodo",
+        "apps.todos.forms.CreateNeverEndingTodo",
+        "apps.todos.forms.CreateRepetitiveTodo",
+        "apps.todos.forms.CreateNotesTodo",
+        "apps.todos.forms.UpdateNotesTodo",
+        "apps.todos.forms.UpdateRepetitiveTodo",
+        "apps.todos.forms.CreatePipelineTodo",
+        "apps.todos.forms.UpdateTodoSettings",
+        "apps.todos.forms.CreatePage",
+        "apps.todos.forms.UpdatePage",
+        "apps.todos.forms.SharePage",
+        "apps.todos.forms.DeletePage",
+    ]
@@ -0,0 +1,76 @@
+import hashlib
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.utils.safestring import SafeString, mark_safe
+
+from apps.users.models import CustomUser
+
+
+def get_version_key(user_pk: int) -> str:
+    return f"todos:version:{user_pk}"
+
+
+def get_version(user_pk: int) -> int:
+    key = get_version_key(user_pk)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so that an evicted counter never reuses a version
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(user_pk: int):
+    key = get_version_key(user_pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def count(name: str):
+    key = f"todos:fragment:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_stats() -> dict[str, int]:
+    return {
+        "hits": cache.get("todos:fragment:hits", 0),
+        "misses": cache.get("todos:fragment:misses", 0),
+    }
+
+
+def get_fragment_key(request: HttpRequest, page_pk: int | None, kind: str) -> str:
+    user = request.user
+    assert isinstance(user, CustomUser)
+    # the fragment contains forms, so it is only valid for the csrf secret and
+    # the url it was rendered for
+    get_token(request)
+    secret = request.META.get("CSRF_COOKIE", "")
+    variant = f"{secret}:{request.get_full_path()}:{user.show_old_todos}"
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    version = get_version(user.pk)
+    return f"todos:fragment:{user.pk}:{version}:{page_pk}:{kind}:{digest}"
+
+
+def get_fragment(
+    request: HttpRequest, page_pk: int | None, kind: str, render: Callable[[], str]
+) -> tuple[SafeString, bool]:
+    key = get_fragment_key(request, page_pk, kind)
+    fragment = cache.get(key)
+    if fragment is not None:
+        count("hits")
+        return mark_safe(fragment), True
+    count("misses")
+    fragment = render()
+    cache.set(key, str(fragment), settings.TODOS_FRAGMENT_TIMEOUT)
+    return mark_safe(fragment), False
@@ -332,6 +332,7 @@ class DeleteTodo(FormClass, OptsUserInstance[NormalTodo], forms.ModelForm):
 
 class ToggleTodo(FormClass, OptsAnonymousUserInstance[Todo], forms.ModelForm):
     page_uuid = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    fragment_template = "todos/symbols/todo.html"
 
     class Meta:
         model = Todo
@@ -349,6 +350,20 @@ class ToggleTodo(FormClass, OptsAnonymousUserInstance[Todo], forms.ModelForm):
         self.instance.save()
         return self.instance.pk
 
+    def get_json(self) -> dict:
+        return {
+            "pk": self.instance.pk,
+            "status": self.instance.status,
+            "is_done": self.instance.is_done,
+        }
+
+    def get_fragment_context(self) -> dict:
+        return {
+            "t": self.instance,
+            "back": self.opts.get("success", ""),
+            "page_uuid": self.opts.get("page_uuid", ""),
+        }
+
 
 class UpdateTodoSettings(FormClass, OptsUserInstance[CustomUser], forms.ModelForm):
     addons = {"navs": ["settings"]}
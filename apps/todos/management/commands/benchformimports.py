@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# importlib.import_module is not reported by -X importtime, so the script also
+# reports which of the watched modules ended up in sys.modules
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+import config.urls
+from apps.actions import FORMS
+from config.form import get_form_class
+ready = time.perf_counter()
+for name in {names}:
+    get_form_class(name)
+done = time.perf_counter()
+watch = {watch}
+print(json.dumps({{
+    "setup": ready - start,
+    "forms": done - ready,
+    "loaded": [m for m in watch if m in sys.modules],
+}}))
+"""
+
+WATCH = [
+    "telegram",
+    "tinymce.widgets",
+    "django.contrib.auth.forms",
+    "django.core.mail",
+    "apps.todos.forms",
+    "apps.goals.forms",
+    "apps.notes.forms",
+    "apps.users.forms",
+    "apps.uploads.forms",
+]
+
+
+def measure(names: str) -> tuple[dict, list[tuple[int, str]]]:
+    """
+    Run the script in a fresh interpreter with -X importtime. Returns what the
+    script reported and the slowest top level imports in microseconds.
+    """
+    script = SCRIPT.format(names=names, watch=repr(WATCH))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return json.loads(result.stdout), sorted(imports, reverse=True)[:5]
+
+
+class Command(BaseCommand):
+    help = "Measure the imports for serving one form against importing every form"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", default="ToggleTodo")
+
+    def report(self, label: str, names: str):
+        stats, slowest = measure(names)
+        self.stdout.write(
+            f"{label}: setup {stats['setup'] * 1000:.1f} ms, "
+            f"forms {stats['forms'] * 1000:.1f} ms"
+        )
+        self.stdout.write(f"  loaded: {', '.join(stats['loaded']) or '-'}")
+        for cumulative, name in slowest:
+            self.stdout.write(f"  {cumulative / 1000:>8.1f} ms {name}")
+
+    def handle(self, *args, **options):
+        self.report("one form", repr([options["form"]]))
+        self.report("all forms", "list(FORMS)")
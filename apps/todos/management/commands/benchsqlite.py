@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from apps.todos.forms import ToggleTodo
+from apps.todos.models import NormalTodo, Todo
+from apps.todos.utils import get_todo_list
+from apps.users.models import CustomUser
+
+KINDS = ["NormalTodo", "PipelineTodo", "NeverEndingTodo", "RepetitiveTodo"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark todo list reads while ToggleTodo writes run in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--todos", type=int, default=200)
+        parser.add_argument(
+            "--defaults",
+            action="store_true",
+            help="use the sqlite defaults instead of settings.SQLITE_PRAGMAS",
+        )
+
+    def run(self, fn, until: float, counts: dict[str, int]):
+        try:
+            while time.perf_counter() < until:
+                try:
+                    fn()
+                    counts["ok"] += 1
+                except OperationalError:
+                    counts["locked"] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        if options["defaults"]:
+            settings.SQLITE_PRAGMAS = {"journal_mode": "DELETE"}
+        connection.close()
+
+        # the benchmark writes, so it runs against a throwaway database file
+        # and never touches the configured one
+        old_name = connection.settings_dict["NAME"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                temp_dir, "benchsqlite.sqlite3"
+            )
+            connection.creation.create_test_db(verbosity=0, serialize=False)
+            try:
+                self.fill_and_measure(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def fill_and_measure(self, options):
+        user = CustomUser.objects.create(email="benchsqlite@localhost")
+        with transaction.atomic():
+            for i in range(options["todos"]):
+                NormalTodo.objects.create(user=user, name=f"todo {i}")
+        pks = list(Todo.objects.filter(user=user).values_list("pk", flat=True))
+        self.measure(user, pks, options)
+
+    def measure(self, user: CustomUser, pks: list[int], options):
+        def read():
+            get_todo_list(Todo.objects.filter(user=user, page=None), KINDS)
+
+        position = {"i": 0}
+
+        def write():
+            position["i"] = (position["i"] + 1) % len(pks)
+            form = ToggleTodo(user, opts={"pk": pks[position["i"]]}, data={})
+            assert form.is_valid()
+            form.ok()
+
+        seconds = options["seconds"]
+        until = time.perf_counter() + seconds
+        reads = [{"ok": 0, "locked": 0} for _ in range(options["readers"])]
+        writes = {"ok": 0, "locked": 0}
+        threads = [
+            threading.Thread(target=self.run, args=(read, until, counts))
+            for counts in reads
+        ]
+        threads.append(threading.Thread(target=self.run, args=(write, until, writes)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+        read_ok = sum(r["ok"] for r in reads)
+        read_locked = sum(r["locked"] for r in reads)
+        self.stdout.write(f"journal mode: {journal_mode}")
+        self.stdout.write(
+            f"reads:  {read_ok / seconds:>8.1f}/s ({read_locked} locked errors)"
+        )
+        self.stdout.write(
+            f"writes: {writes['ok'] / seconds:>8.1f}/s ({writes['locked']} locked errors)"
+        )
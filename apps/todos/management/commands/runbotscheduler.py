@@ -0,0 +1,51 @@
+import asyncio
+import signal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.todos.scheduler import (
+    Scheduler,
+    get_due_times,
+    make_dispatch,
+    watch_outbox,
+)
+from config.bot import RateLimiter, get_bot
+
+
+class Command(BaseCommand):
+    help = "Keep running and send the bot updates of every page when they are due"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=settings.TELEGRAM_CONCURRENCY
+        )
+        parser.add_argument(
+            "--health-file", default=settings.TODOS_SCHEDULER_HEALTH_FILE
+        )
+
+    async def async_handle(self, concurrency: int, health_file: str):
+        dispatch = make_dispatch(concurrency, RateLimiter())
+        scheduler = Scheduler(dispatch, health_file=health_file)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, scheduler.stop)
+
+        due = await sync_to_async(get_due_times)(timezone.now())
+        for pk, at in due.items():
+            scheduler.schedule(pk, at)
+        self.stdout.write(f"scheduled {len(scheduler.due)} pages")
+
+        interval = settings.TODOS_OUTBOX_POLL_INTERVAL
+        async with get_bot().request:
+            watcher = asyncio.create_task(watch_outbox(scheduler, interval))
+            try:
+                await scheduler.run()
+            finally:
+                watcher.cancel()
+
+    def handle(self, *args, **options):
+        asyncio.run(self.async_handle(options["concurrency"], options["health_file"]))
+        self.stdout.write(self.style.SUCCESS("bot scheduler stopped"))
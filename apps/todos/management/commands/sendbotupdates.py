@@ -1,19 +1,37 @@
 import asyncio
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from apps.todos.models import Page
+from apps.todos.models import PageEvent
+from apps.todos.updates import (
+    UPDATE,
+    collect_updates,
+    get_pages,
+    send_updates,
+    store_updates,
+)
+from config.bot import RateLimiter, get_bot
 
 
 class Command(BaseCommand):
-    help = "Test bot command"
+    help = "Send the todo updates of the shared pages to their telegram chats"
 
-    async def async_handle(self, pages: list[Page]):
-        for page in pages:
-            if page.can_send_updates():
-                await page.send_updates()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=settings.TELEGRAM_CONCURRENCY
+        )
+
+    async def async_handle(self, updates: list[UPDATE], concurrency: int) -> list[int]:
+        # open the connection pool of the bot for this event loop only
+        async with get_bot().request:
+            return await send_updates(updates, concurrency, RateLimiter())
 
     def handle(self, *args, **options):
-        pages = Page.objects.all()
-        asyncio.run(self.async_handle(list(pages)))
-        self.stdout.write(self.style.SUCCESS("bot updates sent"))
+        # every page is handled, so the outbox is done up to here as well
+        _, last = PageEvent.get_pending()
+        updates = collect_updates(get_pages())
+        results = asyncio.run(self.async_handle(updates, options["concurrency"]))
+        sent = store_updates(updates, results)
+        PageEvent.clear(None, last)
+        self.stdout.write(self.style.SUCCESS(f"{sent} bot updates sent"))
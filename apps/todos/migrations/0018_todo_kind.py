@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:25
+
+from django.db import migrations, models
+
+
+def set_kind(apps, schema_editor):
+    Todo = apps.get_model("todos", "Todo")
+    for kind in [
+        "NormalTodo",
+        "RepetitiveTodo",
+        "NeverEndingTodo",
+        "PipelineTodo",
+        "NotesTodo",
+    ]:
+        cls = apps.get_model("todos", kind)
+        Todo.objects.filter(pk__in=cls.objects.values("todo_ptr")).update(kind=kind)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0017_page_messages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todo",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("Todo", "Todo"),
+                    ("NormalTodo", "NormalTodo"),
+                    ("RepetitiveTodo", "RepetitiveTodo"),
+                    ("NeverEndingTodo", "NeverEndingTodo"),
+                    ("PipelineTodo", "PipelineTodo"),
+                    ("NotesTodo", "NotesTodo"),
+                ],
+                default="Todo",
+                editable=False,
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(set_kind, migrations.RunPython.noop),
+    ]
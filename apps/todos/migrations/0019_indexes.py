@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0018_todo_kind"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["user", "status", "activate"], name="todo_user_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["user", "page", "completed"], name="todo_user_page_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(fields=["page", "status"], name="todo_page_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                condition=models.Q(("page", None)),
+                fields=["user", "status", "activate"],
+                name="todo_user_nopage_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:39
+
+import uuid
+
+from django.db import migrations, models
+
+
+def set_series(apps, schema_editor):
+    for name in ["RepetitiveTodo", "NeverEndingTodo"]:
+        cls = apps.get_model("todos", name)
+        previous = dict(cls.objects.values_list("pk", "previous"))
+        after = {p: pk for pk, p in previous.items() if p is not None}
+        heads = [pk for pk, p in previous.items() if p not in previous]
+        # walk every chain from its head, leftovers of broken chains start new ones
+        seen: set[int] = set()
+        todos = []
+        for head in heads + list(previous):
+            if head in seen:
+                continue
+            series_id = uuid.uuid4()
+            pk, sequence = head, 0
+            while pk is not None and pk not in seen:
+                seen.add(pk)
+                todos.append(cls(pk=pk, series_id=series_id, sequence=sequence))
+                pk, sequence = after.get(pk), sequence + 1
+        cls.objects.bulk_update(todos, ["series_id", "sequence"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0019_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="neverendingtodo",
+            name="sequence",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="neverendingtodo",
+            name="series_id",
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+        migrations.AddField(
+            model_name="repetitivetodo",
+            name="sequence",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="repetitivetodo",
+            name="series_id",
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+        migrations.RunPython(set_series, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="neverendingtodo",
+            index=models.Index(
+                fields=["series_id", "sequence"], name="neverending_series_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="repetitivetodo",
+            index=models.Index(
+                fields=["series_id", "sequence"], name="repetitive_series_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:45
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_messages(apps, schema_editor):
+    Page = apps.get_model("todos", "Page")
+    Message = apps.get_model("todos", "Message")
+    for page_pk, messages in Page.objects.values_list("pk", "messages"):
+        if not messages:
+            continue
+        objs = [
+            Message(
+                page_id=page_pk,
+                text=msg.get("text", ""),
+                datetime=datetime.fromisoformat(
+                    msg.get("datetime", "1970-01-01T00:00:00")
+                ),
+            )
+            for msg in messages
+        ]
+        Message.objects.bulk_create(objs, batch_size=500)
+        # the old field still shadows the reverse relation, so no Page instances
+        Page.objects.filter(pk=page_pk).update(last_message_at=objs[-1].datetime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0020_series"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="page",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="Message",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.TextField()),
+                ("datetime", models.DateTimeField()),
+                (
+                    "page",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="messages",
+                        to="todos.page",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("datetime",),
+                "indexes": [
+                    models.Index(
+                        fields=["page", "datetime"], name="message_page_datetime_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_messages, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="page",
+            name="messages",
+        ),
+    ]
@@ -1,20 +1,17 @@
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Optional, TypedDict
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TypedDict
 from uuid import uuid4
 
-from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, Exists, Q, Value, When
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
 from django.urls import reverse
 from django.utils import timezone
 
+from apps.todos.cache import bump_version
 from apps.users.models import CustomUser
-from config.bot import get_bot
-
-
-class Message(TypedDict):
-    text: str
-    datetime: datetime
+from config.bot import RateLimiter, get_bot
 
 
 class Page(models.Model):
@@ -28,10 +25,13 @@ class Page(models.Model):
     telegram_chat_id = models.CharField(max_length=100, null=True, blank=True)
     telegram_user_tag = models.CharField(max_length=100, null=True, blank=True)
 
-    messages = models.JSONField(default=list, blank=True)
+    # the time of the newest message, kept here so that deciding whether to send
+    # needs no look into the message table
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     if TYPE_CHECKING:
         todos: models.QuerySet["Todo"]
+        messages: models.QuerySet["Message"]
 
     class Meta:
         ordering = ("name",)
@@ -39,22 +39,25 @@ class Page(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # let the bot scheduler pick up new chats and sharing settings
+            if self.can_send_updates():
+                PageEvent.objects.create(page=self)
+        bump_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        ret = super().delete(*args, **kwargs)
+        bump_version(self.user_id)
+        return ret
+
     @property
     def link(self):
         if self.is_shared and self.share_uuid:
             return reverse("shared_page", kwargs={"uuid": self.share_uuid})
         return ""
 
-    @property
-    def last_message(self) -> Optional[Message]:
-        if not self.messages:
-            return None
-        msg: dict = self.messages[-1]
-        return Message(
-            text=msg.get("text", ""),
-            datetime=datetime.fromisoformat(msg.get("datetime", "1970-01-01T00:00:00")),
-        )
-
     def can_send_updates(self) -> bool:
         return self.is_shared and self.telegram_chat_id is not None
 
@@ -66,36 +69,57 @@ class Page(models.Model):
         self.is_shared = False
         self.share_uuid = None
 
-    async def send_message(self, text: str):
+    async def send_message(self, text: str, limiter: Optional[RateLimiter] = None):
         bot = get_bot()
         assert self.telegram_chat_id is not None
+        if limiter is not None:
+            await limiter.wait(self.telegram_chat_id)
         await bot.send_message(chat_id=self.telegram_chat_id, text=text)
 
     def should_send_new_message(self) -> bool:
-        last_msg = self.last_message
-        if not last_msg:
+        if self.last_message_at is None:
             return True
-        if last_msg["datetime"] + timedelta(hours=2) > timezone.now():
+        if self.last_message_at + timedelta(hours=2) > timezone.now():
             return False
         if timezone.now().hour == 8:
             return True
         return False
 
+    def get_next_update_at(self, now: datetime) -> Optional[datetime]:
+        """
+        The earliest time from `now` on at which should_send_new_message can be
+        true, None for pages without a chat.
+        """
+        if not self.can_send_updates():
+            return None
+        if self.last_message_at is None:
+            return now
+        earliest = max(now, self.last_message_at + timedelta(hours=2))
+        window = earliest.replace(hour=8, minute=0, second=0, microsecond=0)
+        if earliest >= window + timedelta(hours=1):
+            window += timedelta(days=1)
+        return max(window, earliest)
+
+    # the getters below filter self.todos.all() in memory so that they can run
+    # on todos that were prefetched for many pages at once
     def _get_todo_names(self) -> tuple[int, str]:
-        todos = self.todos.filter(status="ACTIVE")
+        todos = [todo for todo in self.todos.all() if todo.status == "ACTIVE"]
         if not todos:
             return 0, "No active todos."
-        return todos.count(), "\n".join(f"⏰ {todo.name}" for todo in todos)
+        return len(todos), "\n".join(f"⏰ {todo.name}" for todo in todos)
 
     def _get_completed_since_last_message(self) -> list["Todo"]:
-        last_msg = self.last_message
-        if not last_msg:
+        last_message_at = self.last_message_at
+        if last_message_at is None:
             return []
-        return list(
-            self.todos.filter(
-                completed__gt=last_msg["datetime"], status="DONE"
-            ).order_by("-completed")
-        )
+        todos = [
+            todo
+            for todo in self.todos.all()
+            if todo.status == "DONE"
+            and todo.completed is not None
+            and todo.completed > last_message_at
+        ]
+        return sorted(todos, key=lambda todo: todo.completed, reverse=True)
 
     def _get_completed_names(self) -> str:
         completed_todos = self._get_completed_since_last_message()
@@ -106,38 +130,102 @@ class Page(models.Model):
             for todo in completed_todos
         )
 
-    def _save_message(self, text: str):
-        self.messages.append(
-            {
-                "text": text,
-                "datetime": timezone.now().isoformat(),
-            }
-        )
-        self.save()
+    def _add_message(self, text: str) -> "Message":
+        message = Message(page=self, text=text, datetime=timezone.now())
+        self.last_message_at = message.datetime
+        return message
 
-    async def send_completed_todos(self):
-        completed_names = await sync_to_async(self._get_completed_names)()
+    def _get_completed_text(self) -> str:
+        completed_names = self._get_completed_names()
         if not completed_names:
-            return
-        text = f"{self.telegram_user_tag} thank you for completing the following todos:\n{completed_names}"
-        await self.send_message(text)
-        await sync_to_async(self._save_message)(text)
+            return ""
+        return f"{self.telegram_user_tag} thank you for completing the following todos:\n{completed_names}"
 
-    async def send_current_todos(self):
+    def _get_current_text(self) -> str:
         if not self.should_send_new_message():
-            return
+            return ""
         pre = f"{self.telegram_user_tag} " if self.telegram_user_tag else ""
-        count, names = await sync_to_async(self._get_todo_names)()
+        count, names = self._get_todo_names()
         if count == 0:
-            return
+            return ""
         link = f"Check: https://goals.danielmoessner.de{self.link}"
-        text = f"{pre}you have {count} active todos:\n{names}\n{link}"
-        await self.send_message(text)
-        await sync_to_async(self._save_message)(text)
+        return f"{pre}you have {count} active todos:\n{names}\n{link}"
+
+    def collect_updates(self) -> list["Message"]:
+        """
+        Return the unsaved messages that are due for the chat of this page. The
+        caller stores the ones that were sent together with `last_message_at`.
+        """
+        messages = []
+        for get_text in [self._get_completed_text, self._get_current_text]:
+            if text := get_text():
+                messages.append(self._add_message(text))
+        return messages
+
+
+class Message(models.Model):
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="messages")
+    text = models.TextField()
+    datetime = models.DateTimeField()
+
+    class Meta:
+        ordering = ("datetime",)
+        indexes = [
+            models.Index(fields=["page", "datetime"], name="message_page_datetime_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.page_id}: {self.datetime}"
+
+    @staticmethod
+    def prune(days: int) -> int:
+        """
+        Delete the messages that are older than the given number of days. The
+        time of the newest message stays on the page.
+        """
+        before = timezone.now() - timedelta(days=days)
+        deleted, _ = Message.objects.filter(datetime__lt=before).delete()
+        return deleted
+
+
+class PageEvent(models.Model):
+    """
+    Outbox of the bot. A row is written in the same transaction as a completed
+    todo or a changed page and removed once the bot scheduler handled the page.
+    """
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="events")
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.page_id}: {self.created}"
+
+    @staticmethod
+    def get_pending() -> tuple[set[int], int]:
+        """
+        The pages with events and the newest event pk, with one query.
+        """
+        pks, last = set(), 0
+        for pk, page_pk in PageEvent.objects.values_list("pk", "page").order_by():
+            pks.add(page_pk)
+            last = max(last, pk)
+        return pks, last
+
+    @staticmethod
+    def clear(page_pks: Iterable[int] | None, last: int):
+        events = PageEvent.objects.filter(pk__lte=last)
+        if page_pks is not None:
+            events = events.filter(page__in=page_pks)
+        events.delete()
+
 
-    async def send_updates(self):
-        await self.send_completed_todos()
-        await self.send_current_todos()
+TODO_KINDS = [
+    "NormalTodo",
+    "RepetitiveTodo",
+    "NeverEndingTodo",
+    "PipelineTodo",
+    "NotesTodo",
+]
 
 
 class Todo(models.Model):
@@ -151,6 +239,10 @@ class Todo(models.Model):
     completed = models.DateTimeField(null=True, blank=True)
     status_choices = (("ACTIVE", "Active"), ("DONE", "Done"), ("FAILED", "Failed"))
     status = models.CharField(choices=status_choices, max_length=20, default="ACTIVE")
+    kind_choices = [(k, k) for k in ["Todo"] + TODO_KINDS]
+    kind = models.CharField(
+        choices=kind_choices, max_length=20, default="Todo", editable=False
+    )
     created = models.DateTimeField(auto_created=True, null=True)
     updated = models.DateTimeField(auto_now=True, null=True)
 
@@ -159,6 +251,20 @@ class Todo(models.Model):
 
     class Meta:
         ordering = ("status", "-completed", "name", "deadline", "activate")
+        indexes = [
+            models.Index(
+                fields=["user", "status", "activate"], name="todo_user_status_idx"
+            ),
+            models.Index(
+                fields=["user", "page", "completed"], name="todo_user_page_idx"
+            ),
+            models.Index(fields=["page", "status"], name="todo_page_status_idx"),
+            models.Index(
+                fields=["user", "status", "activate"],
+                condition=Q(page=None),
+                name="todo_user_nopage_idx",
+            ),
+        ]
 
     @staticmethod
     def get_todos(todos, include_old_todos=False):
@@ -172,6 +278,24 @@ class Todo(models.Model):
         todos = Todo.get_todos(all_todos, include_old_todos=user.show_old_todos)
         return todos
 
+    @staticmethod
+    def completed_sort_expression():
+        # same value as completed_sort but computed by the database
+        def date_number(field: str):
+            return (
+                ExtractYear(field) * 10000
+                + ExtractMonth(field) * 100
+                + ExtractDay(field)
+            )
+
+        return Case(
+            When(completed__isnull=False, then=100 * date_number("completed")),
+            When(deadline__isnull=False, then=10 * date_number("deadline")),
+            When(activate__isnull=False, then=Value(10 * 88888888)),
+            default=Value(99999999),
+            output_field=models.BigIntegerField(),
+        )
+
     @property
     def completed_sort(self):
         if not self.completed:
@@ -238,6 +362,9 @@ class Todo(models.Model):
     def save(
         self, force_insert=False, force_update=False, using=None, update_fields=None
     ):
+        # remember the concrete subclass
+        if self.type in TODO_KINDS:
+            self.kind = self.type
         # set completed
         if self.completed is None and (
             self.status == "DONE" or self.status == "FAILED"
@@ -252,13 +379,34 @@ class Todo(models.Model):
             self.pipeline_todos.filter(activate=None).update(
                 status="FAILED", activate=timezone.now()
             )
-        # save
-        super().save(
-            force_insert=force_insert,
-            force_update=force_update,
-            using=using,
-            update_fields=update_fields,
+        # tell the bot about completions on pages with a chat
+        # with one query, a todo that was done already is no new completion
+        completes = (
+            self.status == "DONE"
+            and self.page_id is not None
+            and Page.objects.filter(
+                ~Exists(Todo.objects.filter(pk=self.pk, status="DONE")),
+                pk=self.page_id,
+                is_shared=True,
+                telegram_chat_id__isnull=False,
+            ).exists()
         )
+        # save
+        with transaction.atomic():
+            super().save(
+                force_insert=force_insert,
+                force_update=force_update,
+                using=using,
+                update_fields=update_fields,
+            )
+            if completes:
+                PageEvent.objects.create(page_id=self.page_id)
+        bump_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        ret = super().delete(*args, **kwargs)
+        bump_version(self.user_id)
+        return ret
 
     def __str__(self):
         return "{}: {} - {}".format(
@@ -302,17 +450,35 @@ class NormalTodo(Todo):
     pass
 
 
+class Occurrence(TypedDict):
+    todo: "RepetitiveTodo"
+    sequence: int
+    activate: datetime
+    deadline: datetime
+    stored: bool
+
+
 class RepetitiveTodo(Todo):
     duration = models.DurationField()
     previous = models.OneToOneField(
         "self", blank=True, null=True, on_delete=models.SET_NULL, related_name="next"  # type: ignore
     )
     blocked = models.BooleanField(default=False)
+    # every todo of a chain shares the series, the sequence grows along the chain
+    series_id = models.UUIDField(default=uuid4, editable=False)
+    sequence = models.PositiveIntegerField(default=0, editable=False)
 
     if TYPE_CHECKING:
         next: "RepetitiveTodo"
         previous: Optional["RepetitiveTodo"]
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["series_id", "sequence"], name="repetitive_series_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name}"
 
@@ -327,13 +493,15 @@ class RepetitiveTodo(Todo):
             n.delete()
 
     def delete(self, using=None, keep_parents=False):
-        next_rtd = self.get_next()
-        if next_rtd and self.previous:
-            next_rtd.previous = self.previous
+        # hand the previous todo over to the next one, the sequence keeps its gap
+        with transaction.atomic():
+            if self.previous_id is not None:
+                RepetitiveTodo.objects.filter(pk=self.pk).update(previous=None)
+            RepetitiveTodo.objects.filter(previous=self).update(
+                previous=self.previous_id
+            )
             self.previous = None
-            self.save()
-            next_rtd.save()
-        return super(RepetitiveTodo, self).delete(using, keep_parents)
+            return super(RepetitiveTodo, self).delete(using, keep_parents)
 
     def get_next(self):
         try:
@@ -343,17 +511,100 @@ class RepetitiveTodo(Todo):
         return next_rtd
 
     def get_all_after(self):
-        repetitive_todos = [self]
-        next_repetitive_to_do = self.get_next()
-        if next_repetitive_to_do:
-            repetitive_todos = repetitive_todos + next_repetitive_to_do.get_all_after()
-        return repetitive_todos
+        return list(
+            RepetitiveTodo.objects.filter(
+                series_id=self.series_id, sequence__gte=self.sequence
+            ).order_by("sequence")
+        )
 
     def get_all_before(self):
-        q = RepetitiveTodo.objects.filter(pk=self.pk)
-        if self.previous:
-            q = q | self.previous.get_all_before()
-        return q
+        return RepetitiveTodo.objects.filter(
+            series_id=self.series_id, sequence__lte=self.sequence
+        )
+
+    def get_occurrences(
+        self, until: datetime | None = None, since: datetime | None = None
+    ) -> Iterator[Occurrence]:
+        """
+        Yield the occurrences that follow this todo, computed from its activate,
+        deadline and duration without touching the database. Occurrences that
+        activate before `since` are skipped. Without `until` the generator never
+        ends, so take as many as needed.
+        """
+        if self.activate is None or self.deadline is None:
+            return
+        if self.duration <= timedelta(0):
+            return
+        step = 1
+        if since is not None:
+            # the first step that activates at or after since
+            step = max(step, -((self.activate - since) // self.duration))
+        while until is None or self.activate + step * self.duration < until:
+            yield Occurrence(
+                todo=self,
+                sequence=self.sequence + step,
+                activate=self.activate + step * self.duration,
+                deadline=self.deadline + step * self.duration,
+                stored=False,
+            )
+            step += 1
+
+    def materialize(self, until: datetime) -> list["RepetitiveTodo"]:
+        """
+        Store the occurrences that activate before `until` behind the last todo of
+        this series and return them. Each table gets one insert, however long the
+        horizon is.
+        """
+        last = self.get_all_after()[-1]
+        todos = [
+            RepetitiveTodo(
+                user_id=last.user_id,
+                name=last.name,
+                kind="RepetitiveTodo",
+                activate=occurrence["activate"],
+                deadline=occurrence["deadline"],
+                duration=last.duration,
+                series_id=last.series_id,
+                sequence=occurrence["sequence"],
+            )
+            for occurrence in last.get_occurrences(until)
+        ]
+        if not todos:
+            return []
+        # bulk_create refuses multi-table models, so the todo rows are created
+        # with the bulk_create of Todo and the repetitive rows with one statement
+        shared = [f for f in Todo._meta.concrete_fields if not f.primary_key]
+        own = RepetitiveTodo._meta.local_concrete_fields
+        with transaction.atomic():
+            parents = Todo.objects.bulk_create(
+                [
+                    Todo(**{f.attname: getattr(t, f.attname) for f in shared})
+                    for t in todos
+                ]
+            )
+            previous = last
+            for todo, parent in zip(todos, parents):
+                todo.pk = todo.id = parent.pk
+                todo.previous = previous
+                todo._state.adding = False
+                previous = todo
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    "INSERT INTO {} ({}) VALUES ({})".format(
+                        connection.ops.quote_name(RepetitiveTodo._meta.db_table),
+                        ", ".join(connection.ops.quote_name(f.column) for f in own),
+                        ", ".join(["%s"] * len(own)),
+                    ),
+                    [
+                        [
+                            f.get_db_prep_save(getattr(t, f.attname), connection)
+                            for f in own
+                        ]
+                        for t in todos
+                    ],
+                )
+        bump_version(last.user_id)
+        return todos
 
     def generate_next(self):
         assert self.deadline is not None
@@ -364,6 +615,8 @@ class RepetitiveTodo(Todo):
             name=self.name,
             user=self.user,
             previous=self,
+            series_id=self.series_id,
+            sequence=self.sequence + 1,
             deadline=next_deadline,
             activate=next_activate,
             duration=self.duration,
@@ -376,14 +629,22 @@ class NeverEndingTodo(Todo):
         "self", blank=True, null=True, on_delete=models.SET_NULL, related_name="next"
     )
     blocked = models.BooleanField(default=False)
+    series_id = models.UUIDField(default=uuid4, editable=False)
+    sequence = models.PositiveIntegerField(default=0, editable=False)
 
     if TYPE_CHECKING:
         next: "NeverEndingTodo"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["series_id", "sequence"], name="neverending_series_idx"
+            ),
+        ]
+
     def delete(self, *args, **kwargs):
-        if self.previous is not None:
-            self.previous.blocked = True
-            self.previous.save()
+        if self.previous_id is not None:
+            NeverEndingTodo.objects.filter(pk=self.previous_id).update(blocked=True)
         return super().delete(*args, **kwargs)
 
     def save(self, *args, **kwargs):
@@ -403,6 +664,18 @@ class NeverEndingTodo(Todo):
         except ObjectDoesNotExist:
             return None
 
+    def get_all_after(self):
+        return list(
+            NeverEndingTodo.objects.filter(
+                series_id=self.series_id, sequence__gte=self.sequence
+            ).order_by("sequence")
+        )
+
+    def get_all_before(self):
+        return NeverEndingTodo.objects.filter(
+            series_id=self.series_id, sequence__lte=self.sequence
+        )
+
     @property
     def due_in_str(self):
         if not self.is_active:
@@ -443,6 +716,8 @@ class NeverEndingTodo(Todo):
             name=self.name,
             user=self.user,
             previous=self,
+            series_id=self.series_id,
+            sequence=self.sequence + 1,
             activate=next_activate,
             duration=self.duration,
         )
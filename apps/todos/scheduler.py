@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.todos.models import PageEvent
+from apps.todos.updates import (
+    UPDATE,
+    collect_updates,
+    get_pages,
+    send_updates,
+    store_updates,
+)
+from config.bot import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+DISPATCH = Callable[[list[int]], Awaitable[dict[int, Optional[datetime]]]]
+
+
+class Scheduler:
+    """
+    Keeps the next due time of every page in a heap and sleeps until the first
+    page is due or until `notify` reports new completions. `dispatch` sends the
+    updates of the given pages and returns their next due times.
+    """
+
+    def __init__(
+        self,
+        dispatch: DISPATCH,
+        clock: Callable[[], datetime] = timezone.now,
+        health_file: str | None = None,
+        heartbeat: float = 60,
+    ):
+        self.dispatch = dispatch
+        self.clock = clock
+        self.health_file = health_file
+        self.heartbeat = heartbeat
+        self.queue: list[tuple[datetime, int]] = []
+        self.due: dict[int, datetime] = {}
+        # pages whose dispatch failed are left alone by notify until then
+        self.retry_at: dict[int, datetime] = {}
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+
+    def schedule(self, pk: int, at: Optional[datetime]):
+        # entries that no longer match self.due are skipped when they come up
+        if at is None:
+            self.due.pop(pk, None)
+            return
+        self.due[pk] = at
+        heapq.heappush(self.queue, (at, pk))
+
+    def notify(self, pks: Iterable[int]):
+        now = self.clock()
+        for pk in pks:
+            if self.retry_at.get(pk, now) > now:
+                continue
+            if self.due.get(pk, now) >= now:
+                self.schedule(pk, now)
+        self.wakeup.set()
+
+    def pop_due(self) -> list[int]:
+        now = self.clock()
+        pks = []
+        while self.queue and self.queue[0][0] <= now:
+            at, pk = heapq.heappop(self.queue)
+            if self.due.get(pk) == at:
+                del self.due[pk]
+                pks.append(pk)
+        return pks
+
+    def get_timeout(self) -> float:
+        while self.queue and self.due.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+        if not self.queue:
+            return self.heartbeat
+        seconds = (self.queue[0][0] - self.clock()).total_seconds()
+        return min(max(seconds, 0), self.heartbeat)
+
+    async def tick(self):
+        pks = self.pop_due()
+        if not pks:
+            return
+        try:
+            due = await self.dispatch(pks)
+            for pk in pks:
+                self.retry_at.pop(pk, None)
+        except Exception:
+            logger.exception("dispatching pages %s failed", pks)
+            # try again later instead of spinning on the same pages, their events
+            # stay in the outbox and would notify them again right away
+            retry_at = self.clock() + timedelta(seconds=self.heartbeat)
+            due = {pk: retry_at for pk in pks}
+            self.retry_at.update(due)
+        for pk in pks:
+            self.schedule(pk, due.get(pk))
+
+    def beat(self):
+        if self.health_file is None:
+            return
+        with open(self.health_file, "w") as f:
+            f.write(self.clock().isoformat())
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    async def run(self):
+        while not self.stopping:
+            await self.tick()
+            self.beat()
+            if self.stopping:
+                break
+            await self.wait(self.get_timeout())
+        if self.health_file is not None and os.path.exists(self.health_file):
+            os.remove(self.health_file)
+
+    def stop(self):
+        # the running dispatch finishes, then run returns
+        self.stopping = True
+        self.wakeup.set()
+
+
+def get_next_update_at(page, now: datetime) -> Optional[datetime]:
+    at = page.get_next_update_at(now)
+    if at is not None and at <= now:
+        # the page was just checked, so it is due in the next window at the earliest
+        hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        at = page.get_next_update_at(hour)
+    return at
+
+
+def get_due_times(now: datetime) -> dict[int, Optional[datetime]]:
+    return {page.pk: page.get_next_update_at(now) for page in get_pages()}
+
+
+def get_last_event(pks: list[int]) -> int:
+    last = PageEvent.objects.filter(page__in=pks).aggregate(last=Max("pk"))["last"]
+    return last or 0
+
+
+def store_and_clear(updates: list[UPDATE], results: list[int], pks, last: int):
+    store_updates(updates, results)
+    PageEvent.clear(pks, last)
+
+
+def make_dispatch(concurrency: int, limiter: RateLimiter) -> DISPATCH:
+    async def dispatch(pks: list[int]) -> dict[int, Optional[datetime]]:
+        # events that arrive while sending stay in the outbox for the next round
+        last = await sync_to_async(get_last_event)(pks)
+        pages = await sync_to_async(get_pages)(pks)
+        updates = collect_updates(pages)
+        results = await send_updates(updates, concurrency, limiter)
+        await sync_to_async(store_and_clear)(updates, results, pks, last)
+        now = timezone.now()
+        return {page.pk: get_next_update_at(page, now) for page in pages}
+
+    return dispatch
+
+
+async def watch_outbox(scheduler: Scheduler, interval: float):
+    """
+    Hand the pages with events in the outbox to the scheduler. Every look is one
+    query on the outbox, which is empty while nothing happens. The pages of one
+    look are dispatched together and many events of a page make one dispatch.
+    """
+    while not scheduler.stopping:
+        pks, _ = await sync_to_async(PageEvent.get_pending)()
+        if pks:
+            scheduler.notify(pks)
+        await asyncio.sleep(interval)
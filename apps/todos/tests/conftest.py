@@ -0,0 +1,47 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config.bot import get_bot
+
+
+class FakeBotApi(BaseHTTPRequestHandler):
+    """Answer every sendMessage call after a delay like the real Bot API would."""
+
+    sent: list[str] = []
+    delay = 0.2
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(FakeBotApi.delay)
+        FakeBotApi.sent.append(self.path)
+        message = {
+            "message_id": len(FakeBotApi.sent),
+            "date": int(time.time()),
+            "chat": {"id": 1, "type": "private"},
+            "text": "",
+        }
+        body = json.dumps({"ok": True, "result": message}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot_api(settings):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBotApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.TELEGRAM_BASE_URL = f"http://127.0.0.1:{server.server_port}/bot"
+    get_bot.cache_clear()
+    FakeBotApi.sent = []
+    yield FakeBotApi
+    server.shutdown()
+    get_bot.cache_clear()
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.todos.models import (
+    Message,
+    NeverEndingTodo,
+    NormalTodo,
+    NotesTodo,
+    Page,
+    PipelineTodo,
+    RepetitiveTodo,
+)
+from apps.users.tests.helpers import create_user
+
+
+def create_todos(user, count=3):
+    now = timezone.now()
+    for i in range(count):
+        NormalTodo.objects.create(user=user, name=f"n{i}", activate=now)
+        NormalTodo.objects.create(
+            user=user, name=f"d{i}", activate=now, deadline=now + timedelta(days=i)
+        )
+        done = NormalTodo.objects.create(user=user, name=f"c{i}")
+        done.toggle()
+        done.save()
+        NeverEndingTodo.objects.create(
+            user=user, name=f"ne{i}", activate=now, duration=timedelta(days=1)
+        )
+        RepetitiveTodo.objects.create(
+            user=user,
+            name=f"r{i}",
+            activate=now - timedelta(days=i),
+            deadline=now + timedelta(days=2 * i),
+            duration=timedelta(days=7),
+        )
+        PipelineTodo.objects.create(user=user, name=f"p{i}")
+        NotesTodo.objects.create(
+            user=user, name=f"notes{i}", notes="a\nb", activate=now
+        )
+
+
+def get_query_plans(queries: list[dict]) -> list[str]:
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            if not query["sql"].startswith("SELECT"):
+                continue
+            cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+            plans.append(" ".join(row[3] for row in cursor.fetchall()))
+    return plans
+
+
+def create_pages(count: int) -> list[Page]:
+    user = create_user(save=True)
+    earlier = timezone.now() - timedelta(hours=1)
+    pages = []
+    for i in range(count):
+        page = Page.objects.create(
+            user=user,
+            name=f"page {i}",
+            is_shared=True,
+            telegram_chat_id=str(1000 + i),
+            last_message_at=earlier,
+        )
+        Message.objects.create(page=page, text="hello", datetime=earlier)
+        todo = NormalTodo.objects.create(user=user, page=page, name=f"todo {i}")
+        todo.toggle()
+        todo.save()
+        pages.append(page)
+    return pages
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.todos.models import Message, NormalTodo, Page, PageEvent
+from apps.todos.tests.helpers import create_pages
+from apps.todos.updates import get_pages
+from config.bot import RateLimiter, get_bot
+
+
+def test_rate_limiter():
+    now = [0.0]
+    waits: list[float] = []
+
+    async def sleep(seconds: float):
+        waits.append(seconds)
+
+    limiter = RateLimiter(per_second=10, clock=lambda: now[0], sleep=sleep)
+
+    async def send():
+        for chat_id in ["1", "2", "1", "-3", "-3"]:
+            await limiter.wait(chat_id)
+
+    asyncio.run(send())
+    # the second message of a chat waits a second, groups wait three seconds
+    assert waits == pytest.approx([0.1, 1.0, 1.1, 4.1])
+
+
+def test_sendbotupdates_fans_out(db, bot_api, django_assert_num_queries):
+    pages = create_pages(12)
+
+    start = time.perf_counter()
+    with django_assert_num_queries(9):
+        call_command("sendbotupdates", concurrency=12)
+    duration = time.perf_counter() - start
+
+    assert len(bot_api.sent) == 12
+    assert not PageEvent.objects.exists()
+    # one page after another would take 12 * bot_api.delay
+    assert duration < 12 * bot_api.delay / 2
+    for page in pages:
+        texts = list(page.messages.values_list("text", flat=True))
+        assert len(texts) == 2
+        assert "todo" in texts[-1]
+        assert Page.objects.get(pk=page.pk).last_message_at > page.last_message_at
+
+
+def test_sendbotupdates_keeps_unsent_messages_out(db, settings):
+    settings.TELEGRAM_BASE_URL = "http://127.0.0.1:9/bot"
+    get_bot.cache_clear()
+    (page,) = create_pages(1)
+
+    call_command("sendbotupdates")
+
+    assert page.messages.count() == 1
+    assert Page.objects.get(pk=page.pk).last_message_at == page.last_message_at
+    get_bot.cache_clear()
+
+
+def test_prune_messages(db):
+    (page,) = create_pages(1)
+    Message.objects.create(
+        page=page, text="old", datetime=timezone.now() - timedelta(days=100)
+    )
+
+    assert Message.prune(90) == 1
+    assert list(page.messages.values_list("text", flat=True)) == ["hello"]
+
+
+def test_get_pages_skips_todos_completed_before_the_last_message(db):
+    page = create_pages(1)[0]
+    old = NormalTodo.objects.create(user=page.user, page=page, name="old")
+    old.toggle()
+    old.completed = timezone.now() - timedelta(days=3)
+    old.save()
+
+    todos = get_pages([page.pk])[0].todos.all()
+
+    assert [todo.name for todo in todos] == ["todo 0"]
@@ -0,0 +1,65 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from apps.todos.cache import get_stats
+from apps.todos.models import NormalTodo, Page
+from apps.users.tests.helpers import create_user
+
+
+@pytest.fixture
+def user_client(db):
+    cache.clear()
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    c.user = user
+    yield c
+
+
+def get(client: Client, url: str) -> str:
+    response = client.get(url)
+    assert response.status_code == 200
+    return response["X-Fragment-Cache"]
+
+
+def test_todo_list_is_cached_until_a_todo_changes(user_client):
+    url = reverse("todos") + "?kind=open"
+    todo = NormalTodo.objects.create(user=user_client.user, name="first")
+
+    assert get(user_client, url) == "miss"
+    assert get(user_client, url) == "hit"
+    assert get(user_client, reverse("todos") + "?kind=all") == "miss"
+
+    user_client.post(reverse("form", args=["ToggleTodo"]) + f"?pk={todo.pk}")
+    assert get(user_client, url) == "miss"
+    assert "first" not in user_client.get(url).content.decode()
+
+    todo.delete()
+    assert get(user_client, url) == "miss"
+    assert get_stats() == {"hits": 2, "misses": 4}
+
+
+def test_page_is_cached_until_the_page_changes(user_client):
+    page = Page.objects.create(user=user_client.user, name="page")
+    url = reverse("page", args=[page.pk])
+
+    assert get(user_client, url) == "miss"
+    assert get(user_client, url) == "hit"
+
+    page.name = "renamed"
+    page.save()
+    assert get(user_client, url) == "miss"
+
+
+def test_cache_is_per_user(user_client):
+    other = create_user(email="other@abc.de", save=True, password="pass1234!")
+    page = Page.objects.create(user=user_client.user, name="page")
+    url = reverse("page", args=[page.pk])
+    assert get(user_client, url) == "miss"
+
+    c = Client()
+    c.login(email=other.email, password="pass1234!")
+    with pytest.raises(Page.DoesNotExist):
+        c.get(url)
@@ -0,0 +1,23 @@
+import pytest
+
+from apps.actions import FORMS, load_form_class, register_forms
+from apps.todos.management.commands.benchformimports import measure
+from config.errors import GetFormError
+from config.form import get_form_class
+
+
+def test_every_registered_form_loads():
+    assert len(FORMS) == 41
+    for name in FORMS:
+        assert load_form_class(name).__name__ == name
+    with pytest.raises(GetFormError):
+        get_form_class("NotAForm")
+    with pytest.raises(ValueError):
+        register_forms(["apps.goals.forms.ToggleTodo"])
+
+
+def test_forms_are_imported_on_demand():
+    stats, _ = measure(repr(["ToggleTodo"]))
+    assert "apps.todos.forms" in stats["loaded"]
+    assert "apps.goals.forms" not in stats["loaded"]
+    assert "telegram" not in stats["loaded"]
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.todos.models import Page
+from apps.todos.tests.helpers import create_todos, get_query_plans
+from apps.users.tests.helpers import create_user
+
+
+def get_plans(client: Client, url: str) -> str:
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.get(url).status_code == 200
+    return "\n".join(get_query_plans(ctx.captured_queries))
+
+
+def test_todo_views_use_indexes(db):
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    create_todos(user, 2)
+    page = Page.objects.create(user=user, name="page")
+    page.share()
+    page.save()
+
+    plans = get_plans(c, reverse("todos") + "?kind=open")
+    assert "todos_todo USING INDEX todo_user_nopage_idx" in plans
+    assert "todos_todo USING INDEX todo_user_status_idx" in plans
+
+    plans = get_plans(c, reverse("todos"))
+    assert "todos_todo USING INDEX todo_user_nopage_idx" in plans
+    assert "todos_todo USING INDEX todo_user_page_idx" in plans
+
+    plans = get_plans(c, reverse("page", args=[page.pk]))
+    assert "todos_todo USING INDEX todo_user_page_idx" in plans
+    assert "todos_todo USING INDEX todo_page_status_idx" in plans
+
+    plans = get_plans(Client(), reverse("shared_page", args=[page.share_uuid]))
+    assert "todos_todo USING INDEX todo_page_status_idx" in plans
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.todos.models import RepetitiveTodo
+from apps.todos.utils import get_upcoming_occurrences
+from apps.users.tests.helpers import create_user
+
+
+def create_weekly(user, name="weekly", days=0) -> RepetitiveTodo:
+    now = timezone.now() + timedelta(days=days)
+    return RepetitiveTodo.objects.create(
+        user=user,
+        name=name,
+        activate=now,
+        deadline=now + timedelta(days=1),
+        duration=timedelta(days=7),
+    )
+
+
+def test_get_occurrences(db, django_assert_num_queries):
+    user = create_user(save=True)
+    todo = create_weekly(user)
+
+    with django_assert_num_queries(0):
+        occurrences = list(islice(todo.get_occurrences(), 3))
+        until = list(todo.get_occurrences(todo.activate + timedelta(days=15)))
+    assert [o["sequence"] for o in occurrences] == [1, 2, 3]
+    assert occurrences[2]["activate"] == todo.activate + timedelta(days=21)
+    assert occurrences[2]["deadline"] == todo.deadline + timedelta(days=21)
+    assert until == occurrences[:2]
+    since = todo.activate + timedelta(days=15)
+    later = list(islice(todo.get_occurrences(since=since), 2))
+    assert [o["sequence"] for o in later] == [3, 4]
+
+
+def test_materialize(db, django_assert_num_queries):
+    user = create_user(save=True)
+    todo = create_weekly(user)
+
+    # the series, one insert per table and the savepoint around them
+    with django_assert_num_queries(5):
+        todos = todo.materialize(todo.activate + timedelta(days=22))
+    assert [t.sequence for t in todos] == [1, 2, 3]
+    assert todo.get_all_after() == [todo, *todos]
+    stored = RepetitiveTodo.objects.get(pk=todos[1].pk)
+    assert stored.previous == todos[0] and stored.series_id == todo.series_id
+    assert stored.kind == "RepetitiveTodo" and stored.duration == todo.duration
+    assert RepetitiveTodo.objects.get(pk=todos[0].pk).previous == todo
+
+    with django_assert_num_queries(5):
+        more = todo.materialize(todo.activate + timedelta(weeks=20))
+    assert [t.sequence for t in more] == list(range(4, 20))
+    assert more[0].previous == todos[-1]
+    assert todo.materialize(todo.activate + timedelta(weeks=20)) == []
+
+
+def test_upcoming_occurrences(db, django_assert_num_queries):
+    user = create_user(save=True)
+    weekly = create_weekly(user)
+    weekly.generate_next()
+    create_weekly(user, name="later", days=3)
+    until = weekly.activate + timedelta(weeks=4)
+
+    with django_assert_num_queries(1):
+        occurrences = get_upcoming_occurrences(user, weekly.activate, until)
+    names = [(o["todo"].name, o["stored"]) for o in occurrences]
+    assert names.count(("weekly", True)) == 2
+    assert names.count(("weekly", False)) == 2
+    assert names.count(("later", True)) == 1
+    assert names.count(("later", False)) == 3
+    activates = [o["activate"] for o in occurrences]
+    assert activates == sorted(activates)
+
+
+def test_upcoming_skips_the_past_and_stopped_series(db):
+    user = create_user(save=True)
+    now = timezone.now()
+    # a series that was stopped by deleting its active todo
+    stopped = create_weekly(user, name="stopped", days=-140)
+    stopped.complete()
+    stopped.save()
+    stopped.get_next().delete()
+    # an active todo that is overdue since weeks
+    overdue = create_weekly(user, name="overdue", days=-140)
+
+    occurrences = get_upcoming_occurrences(user, now, now + timedelta(weeks=4))
+    assert {o["todo"].pk for o in occurrences} == {overdue.pk}
+    assert len(occurrences) == 4
+    assert all(o["activate"] >= now for o in occurrences)
+
+
+def test_upcoming_view(db, django_assert_max_num_queries):
+    user = create_user(save=True, password="pass1234!")
+    weekly = create_weekly(user, days=1)
+    weekly.generate_next()
+    create_weekly(user, name="later", days=3)
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+
+    with django_assert_max_num_queries(4):
+        response = c.get(reverse("todos_upcoming"))
+
+    assert response.status_code == 200
+    html = response.content.decode()
+    assert html.count("weekly") == 4 and html.count("later") == 4
@@ -0,0 +1,52 @@
+import asyncio
+
+from apps.todos.models import NormalTodo, Page, PageEvent
+from apps.todos.scheduler import make_dispatch
+from apps.todos.tests.helpers import create_pages
+from apps.users.tests.helpers import create_user
+from config.bot import RateLimiter, get_bot
+
+
+def test_completion_enqueues_event(db, django_assert_num_queries):
+    user = create_user(save=True)
+    page = Page.objects.create(user=user, name="shared")
+    todo = NormalTodo.objects.create(user=user, page=page, name="todo")
+    todo.toggle()
+    todo.save()
+    # pages without a chat stay quiet
+    assert not PageEvent.objects.exists()
+
+    page.share()
+    page.telegram_chat_id = "1"
+    page.save()
+    PageEvent.objects.all().delete()
+    todo.toggle()
+    todo.save()
+    assert not PageEvent.objects.exists()
+
+    todo.toggle()
+    # pipeline, one check of page and status, savepoint, update, parent
+    # update check, event, release
+    with django_assert_num_queries(7):
+        todo.save()
+    assert list(PageEvent.objects.values_list("page", flat=True)) == [page.pk]
+    # saving a todo that is done already is no new completion
+    todo.name = "renamed"
+    todo.save()
+    assert PageEvent.objects.count() == 1
+    assert PageEvent.get_pending()[0] == {page.pk}
+
+
+def test_dispatch_clears_outbox(transactional_db, bot_api):
+    pages = create_pages(3)
+    assert PageEvent.get_pending()[0] == {page.pk for page in pages}
+    dispatch = make_dispatch(2, RateLimiter())
+
+    async def main():
+        async with get_bot().request:
+            return await dispatch([pages[0].pk, pages[1].pk])
+
+    due = asyncio.run(main())
+    assert set(due) == {pages[0].pk, pages[1].pk}
+    assert len(bot_api.sent) == 2
+    assert PageEvent.get_pending()[0] == {pages[2].pk}
@@ -0,0 +1,58 @@
+from django.test import Client
+from django.urls import reverse
+
+from apps.goals.models import ProgressMonitor
+from apps.goals.tests.helpers import create_chain
+from apps.todos.models import NormalTodo
+from apps.users.tests.helpers import create_user
+
+
+def get_client(user) -> Client:
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    return c
+
+
+def test_toggle_todo_returns_fragment_and_json(db):
+    user = create_user(save=True, password="pass1234!")
+    todo = NormalTodo.objects.create(user=user, name="partial")
+    c = get_client(user)
+    url = reverse("form", args=["ToggleTodo"]) + f"?pk={todo.pk}&success=/todos/"
+
+    response = c.post(url, HTTP_X_PARTIAL="fragment")
+    assert response.status_code == 200
+    html = response.content.decode()
+    assert html.strip().startswith("<li")
+    assert "partial" in html and "checked" in html
+    assert "success=/todos/" in html
+
+    response = c.post(url + "&partial=json")
+    assert response.status_code == 200
+    assert response.json() == {"pk": todo.pk, "status": "ACTIVE", "is_done": False}
+
+
+def test_progress_returns_json(db):
+    user = create_user(save=True, password="pass1234!")
+    goals = create_chain(user, 2)
+    monitor = ProgressMonitor.objects.create(goal=goals[-1], name="m", steps=4)
+    c = get_client(user)
+    url = reverse("form", args=["IncreaseProgress"]) + f"?pk={monitor.pk}"
+
+    data = c.post(url, HTTP_X_PARTIAL="json").json()
+
+    assert data["step"] == 1 and data["steps"] == 4
+    assert data["goal"]["pk"] == goals[-1].pk
+    assert data["goal"]["progress_str"] == "25%"
+
+
+def test_partial_errors(db):
+    user = create_user(save=True, password="pass1234!")
+    todo = NormalTodo.objects.create(user=user, name="partial")
+    url = reverse("form", args=["DeleteTodo"]) + f"?pk={todo.pk}"
+
+    assert get_client(user).post(url, HTTP_X_PARTIAL="json").status_code == 400
+    goal = create_chain(user, 1)[0]
+    monitor = ProgressMonitor.objects.create(goal=goal, name="m", steps=4)
+    url = reverse("form", args=["IncreaseProgress"]) + f"?pk={monitor.pk}"
+    assert Client().post(url, HTTP_X_PARTIAL="json").status_code == 403
+    assert NormalTodo.objects.filter(pk=todo.pk).exists()
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.todos.models import TODO_KINDS, NeverEndingTodo, NormalTodo, NotesTodo, Todo
+from apps.todos.utils import (
+    TODO_CLASSES,
+    get_specific_todo,
+    get_specific_todos_in_bulk,
+)
+from apps.users.tests.helpers import create_user
+
+
+def test_specific_todo_needs_at_most_two_queries(db):
+    user = create_user(save=True)
+    normal = NormalTodo.objects.create(user=user, name="normal")
+    never_ending = NeverEndingTodo.objects.create(
+        user=user, name="never", activate=timezone.now(), duration=timedelta(days=2)
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        todo = get_specific_todo(normal.pk, user=user)
+    assert isinstance(todo, NormalTodo)
+    assert len(ctx.captured_queries) == 1
+
+    with CaptureQueriesContext(connection) as ctx:
+        todo = get_specific_todo(never_ending.pk, user=user)
+    assert isinstance(todo, NeverEndingTodo)
+    assert todo.duration == timedelta(days=2)
+    assert len(ctx.captured_queries) == 2
+
+    todo.toggle()
+    todo.save()
+    assert NeverEndingTodo.objects.get(pk=never_ending.pk).is_done
+
+
+def test_specific_todo_respects_filters(db):
+    user = create_user(save=True)
+    other = create_user(email="other@abc.de", save=True)
+    normal = NormalTodo.objects.create(user=user, name="normal")
+    plain = Todo.objects.create(user=user, name="plain")
+
+    with pytest.raises(ObjectDoesNotExist):
+        get_specific_todo(normal.pk, user=other)
+    with pytest.raises(ObjectDoesNotExist):
+        get_specific_todo(plain.pk, user=user)
+
+
+def test_specific_todos_in_bulk(db):
+    user = create_user(save=True)
+    pks = [NormalTodo.objects.create(user=user, name=f"n{i}").pk for i in range(3)]
+    pks += [
+        NotesTodo.objects.create(user=user, name=f"notes{i}", notes="x").pk
+        for i in range(3)
+    ]
+    plain = Todo.objects.create(user=user, name="plain")
+
+    with CaptureQueriesContext(connection) as ctx:
+        todos = get_specific_todos_in_bulk([*pks, plain.pk], user=user)
+    assert len(ctx.captured_queries) == 2
+    assert sorted(todos) == sorted(pks)
+    assert {t.type for t in todos.values()} == {"NormalTodo", "NotesTodo"}
+    assert all(t.notes == "x" for t in todos.values() if isinstance(t, NotesTodo))
+
+
+def test_todo_classes_match_kinds():
+    assert list(TODO_CLASSES) == TODO_KINDS
+    assert all(cls.__name__ == kind for kind, cls in TODO_CLASSES.items())
@@ -0,0 +1,141 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from apps.todos.models import Page
+from apps.todos.scheduler import Scheduler, get_next_update_at
+
+START = datetime(2026, 3, 2, 6, 0)
+
+
+class FakeClock:
+    def __init__(self, now: datetime = START):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+def create_scheduler(clock: FakeClock, dispatched: list[list[int]], **kwargs):
+    async def dispatch(pks: list[int]):
+        dispatched.append(sorted(pks))
+        return {pk: clock() + timedelta(hours=1) for pk in pks}
+
+    return Scheduler(dispatch, clock=clock, **kwargs)
+
+
+def test_next_update_at():
+    page = Page(is_shared=True, telegram_chat_id="1")
+    assert page.get_next_update_at(START) == START
+
+    page.last_message_at = START - timedelta(days=1)
+    assert page.get_next_update_at(START) == START.replace(hour=8)
+
+    page.last_message_at = START.replace(hour=6, minute=30)
+    assert page.get_next_update_at(START) == START.replace(hour=8, minute=30)
+
+    page.last_message_at = START.replace(hour=7, minute=30)
+    assert page.get_next_update_at(START) == START.replace(hour=8) + timedelta(days=1)
+
+    # a page that was just checked in its window waits for the next window
+    page.last_message_at = START - timedelta(days=1)
+    now = START.replace(hour=8, minute=10)
+    assert get_next_update_at(page, now) == START.replace(hour=8) + timedelta(days=1)
+
+    assert Page(is_shared=False).get_next_update_at(START) is None
+
+
+def test_queue_order_and_timeout():
+    clock, dispatched = FakeClock(), []
+    scheduler = create_scheduler(clock, dispatched, heartbeat=3600)
+    scheduler.schedule(1, START + timedelta(minutes=10))
+    scheduler.schedule(2, START + timedelta(minutes=5))
+    # rescheduling replaces the earlier entry of the page
+    scheduler.schedule(2, START + timedelta(minutes=20))
+
+    assert scheduler.get_timeout() == 600
+    clock.advance(minutes=10)
+    assert scheduler.pop_due() == [1]
+    assert scheduler.get_timeout() == 600
+    clock.advance(minutes=15)
+    assert scheduler.pop_due() == [2]
+    assert scheduler.get_timeout() == 3600
+
+    scheduler.schedule(3, START)
+    scheduler.schedule(3, None)
+    assert scheduler.pop_due() == []
+
+
+def test_tick_reschedules():
+    clock, dispatched = FakeClock(), []
+    scheduler = create_scheduler(clock, dispatched)
+    scheduler.schedule(1, START)
+    scheduler.schedule(2, START + timedelta(minutes=30))
+
+    asyncio.run(scheduler.tick())
+    assert dispatched == [[1]]
+    assert scheduler.due == {
+        1: START + timedelta(hours=1),
+        2: START + timedelta(minutes=30),
+    }
+
+    # a completion makes a page due right away
+    scheduler.notify([2])
+    asyncio.run(scheduler.tick())
+    assert dispatched == [[1], [2]]
+
+
+def test_failed_dispatch_backs_off():
+    clock, attempts = FakeClock(), []
+
+    async def dispatch(pks: list[int]):
+        attempts.append(sorted(pks))
+        if len(attempts) == 1:
+            raise RuntimeError("telegram is down")
+        return {pk: clock() + timedelta(hours=1) for pk in pks}
+
+    scheduler = Scheduler(dispatch, clock=clock, heartbeat=60)
+    scheduler.schedule(1, START)
+    asyncio.run(scheduler.tick())
+    assert scheduler.due == {1: START + timedelta(seconds=60)}
+
+    # the events of the page are still in the outbox and notify it every poll
+    clock.advance(seconds=2)
+    scheduler.notify([1])
+    asyncio.run(scheduler.tick())
+    assert attempts == [[1]]
+    assert scheduler.due == {1: START + timedelta(seconds=60)}
+
+    clock.advance(seconds=58)
+    asyncio.run(scheduler.tick())
+    assert attempts == [[1], [1]]
+    assert scheduler.retry_at == {}
+    scheduler.notify([1])
+    assert scheduler.due == {1: clock()}
+
+
+def test_run_wakes_on_notify_and_stops(tmp_path):
+    clock, dispatched = FakeClock(), []
+    health_file = str(tmp_path / "health")
+
+    async def main():
+        scheduler = create_scheduler(clock, dispatched, health_file=health_file)
+        scheduler.schedule(1, START + timedelta(days=1))
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.01)
+        assert dispatched == []
+        with open(health_file) as f:
+            assert f.read() == START.isoformat()
+
+        scheduler.notify([1])
+        await asyncio.sleep(0.01)
+        assert dispatched == [[1]]
+
+        scheduler.stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(main())
+    assert not os.path.exists(health_file)
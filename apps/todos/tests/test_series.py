@@ -0,0 +1,89 @@
+from datetime import timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.utils import timezone
+
+from apps.todos.models import NeverEndingTodo, RepetitiveTodo
+from apps.users.tests.helpers import create_user
+
+migration = import_module("apps.todos.migrations.0020_series")
+
+
+def create_series(user, length: int) -> list[RepetitiveTodo]:
+    now = timezone.now()
+    todo = RepetitiveTodo.objects.create(
+        user=user,
+        name="weekly",
+        activate=now,
+        deadline=now + timedelta(days=1),
+        duration=timedelta(days=7),
+    )
+    todos = [todo]
+    for _ in range(length - 1):
+        todos[-1].generate_next()
+        todos.append(todos[-1].get_next())
+    return todos
+
+
+def test_series_ranges(db, django_assert_num_queries):
+    user = create_user(save=True)
+    todos = create_series(user, 5)
+    assert len({t.series_id for t in todos}) == 1
+    assert [t.sequence for t in todos] == [0, 1, 2, 3, 4]
+
+    with django_assert_num_queries(1):
+        after = todos[2].get_all_after()
+    assert after == todos[2:]
+    with django_assert_num_queries(1):
+        before = set(todos[2].get_all_before())
+    assert before == set(todos[:3])
+
+
+def test_delete_relinks_chain(db, django_assert_max_num_queries):
+    user = create_user(save=True)
+    a, b, c = create_series(user, 3)
+
+    with django_assert_max_num_queries(8):
+        b.delete()
+    c.refresh_from_db()
+    assert c.previous == a
+    assert a.get_all_after() == [a, c]
+
+
+def test_never_ending_series(db):
+    user = create_user(save=True)
+    todo = NeverEndingTodo.objects.create(
+        user=user, name="daily", activate=timezone.now(), duration=timedelta(days=1)
+    )
+    todo.toggle()
+    todo.save()
+    following = todo.next_todo
+    assert following is not None
+    assert (following.series_id, following.sequence) == (todo.series_id, 1)
+
+    following.delete()
+    todo.refresh_from_db()
+    assert todo.blocked
+
+
+def test_backfill(db):
+    user = create_user(save=True)
+    todos = create_series(user, 3)
+    single = create_series(user, 1)[0]
+    RepetitiveTodo.objects.update(sequence=7)
+    for todo in todos:
+        RepetitiveTodo.objects.filter(pk=todo.pk).update(series_id=single.series_id)
+
+    migration.set_series(apps, None)
+
+    rows = {
+        pk: (series_id, sequence)
+        for pk, series_id, sequence in RepetitiveTodo.objects.values_list(
+            "pk", "series_id", "sequence"
+        )
+    }
+    assert [rows[t.pk][1] for t in todos] == [0, 1, 2]
+    assert len({rows[t.pk][0] for t in todos}) == 1
+    assert rows[single.pk][1] == 0
+    assert rows[single.pk][0] != rows[todos[0].pk][0]
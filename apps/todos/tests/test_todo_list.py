@@ -0,0 +1,44 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.todos.models import (
+    NeverEndingTodo,
+    Todo,
+)
+from apps.todos.tests.helpers import create_todos
+from apps.todos.utils import get_todo_list
+from apps.users.tests.helpers import create_user
+
+
+def test_todo_list_is_sorted_and_specific(db):
+    user = create_user(save=True)
+    create_todos(user)
+    kinds = ["NormalTodo", "PipelineTodo", "NeverEndingTodo", "RepetitiveTodo"]
+
+    todos = get_todo_list(Todo.objects.filter(user=user), kinds)
+
+    assert len(todos) == 18
+    assert all(t.type in kinds for t in todos)
+    sorts = [t.completed_sort for t in todos]
+    assert sorts == sorted(sorts)
+    never_ending = [t for t in todos if isinstance(t, NeverEndingTodo)]
+    assert never_ending[0].due_in_str == "Reappears 1 day after completion"
+    assert never_ending[0].next_todo is None
+
+
+def test_todo_list_queries_do_not_grow(db):
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    create_todos(user, 2)
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert c.get(reverse("todos") + "?kind=open").status_code == 200
+    queries = len(ctx.captured_queries)
+
+    create_todos(user, 10)
+    with CaptureQueriesContext(connection) as ctx:
+        assert c.get(reverse("todos") + "?kind=open").status_code == 200
+    assert len(ctx.captured_queries) == queries
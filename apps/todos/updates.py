@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Q, Subquery
+from telegram.error import TelegramError
+
+from apps.todos.models import Message, Page, Todo
+from config.bot import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+UPDATE = tuple[Page, list[Message]]
+
+
+def get_pages(pks: Iterable[int] | None = None) -> list[Page]:
+    # only the todos that were completed since the last message of their page
+    last_message_at = Page.objects.filter(pk=OuterRef("page")).values("last_message_at")
+    todos = Todo.objects.filter(
+        Q(status="ACTIVE") | Q(status="DONE", completed__gt=Subquery(last_message_at))
+    )
+    pages = Page.objects.filter(is_shared=True, telegram_chat_id__isnull=False)
+    if pks is not None:
+        pages = pages.filter(pk__in=pks)
+    return list(pages.prefetch_related(Prefetch("todos", queryset=todos)))
+
+
+def collect_updates(pages: Iterable[Page]) -> list[UPDATE]:
+    updates = [(page, page.collect_updates()) for page in pages]
+    return [(page, messages) for page, messages in updates if messages]
+
+
+async def send_page_messages(
+    page: Page,
+    messages: list[Message],
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+) -> int:
+    sent = 0
+    async with semaphore:
+        try:
+            for message in messages:
+                await page.send_message(message.text, limiter)
+                sent += 1
+        except TelegramError as e:
+            logger.warning("page %s: %s", page.pk, e)
+    return sent
+
+
+async def send_updates(
+    updates: list[UPDATE], concurrency: int, limiter: RateLimiter
+) -> list[int]:
+    """
+    Send the messages of all pages concurrently and return how many messages of
+    each page went out. The connection pool of the bot has to be open.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(
+        *(send_page_messages(p, m, semaphore, limiter) for p, m in updates)
+    )
+
+
+def store_updates(updates: list[UPDATE], results: list[int]) -> int:
+    # forget the messages that could not be sent and store the others at once
+    changed, created = [], []
+    for (page, messages), sent in zip(updates, results):
+        if sent:
+            page.last_message_at = messages[sent - 1].datetime
+            changed.append(page)
+            created.extend(messages[:sent])
+    with transaction.atomic():
+        Message.objects.bulk_create(created)
+        Page.objects.bulk_update(changed, ["last_message_at"])
+        Message.prune(settings.TODOS_MESSAGE_RETENTION_DAYS)
+    return len(created)
@@ -5,7 +5,9 @@ from ..todos import views
 
 urlpatterns = [
     path("todos/", views.todos, name="todos"),
+    path("upcoming/", views.upcoming, name="todos_upcoming"),
     path("page/<int:pk>/", views.page, name="page"),
     path("shared/<uuid:uuid>/", views.shared_page, name="shared_page"),
+    path("cache-stats/", views.cache_stats, name="todos_cache_stats"),
     path("wuerfel/", lambda r: render(r, "wuerfel.html")),
 ]
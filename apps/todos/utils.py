@@ -1,15 +1,18 @@
 from datetime import datetime, timedelta
+from typing import Iterable
 
 from django import forms
+from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, Q, QuerySet
 
-from apps.todos.models import (
-    NeverEndingTodo,
-    NormalTodo,
-    NotesTodo,
-    PipelineTodo,
-    RepetitiveTodo,
-)
+from apps.todos.models import TODO_KINDS, Occurrence, RepetitiveTodo, Todo
+from apps.users.models import CustomUser
+from apps.utils.functional import group_by
+
+TODO_CLASSES: dict[str, type[Todo]] = {
+    kind: apps.get_model("todos", kind) for kind in TODO_KINDS
+}
 
 
 def get_end_of_week():
@@ -54,13 +57,88 @@ def get_date_widget():
     return forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d")
 
 
-def get_specific_todo(pk: int | str, **kwargs):
-    for cls in [NormalTodo, NeverEndingTodo, RepetitiveTodo, PipelineTodo, NotesTodo]:
-        try:
-            return cls.objects.get(pk=pk, **kwargs)
-        except ObjectDoesNotExist:
-            pass
-    raise ObjectDoesNotExist()
+def get_specific_todo(pk: int | str, **kwargs) -> Todo:
+    todo = Todo.objects.get(pk=pk, **kwargs)
+    if todo.kind not in TODO_CLASSES:
+        raise ObjectDoesNotExist()
+    return get_specific_todos([todo])[0]
+
+
+def get_specific_todos_in_bulk(pks: Iterable[int | str], **kwargs) -> dict[int, Todo]:
+    todos = Todo.objects.filter(pk__in=pks, kind__in=TODO_CLASSES, **kwargs)
+    return {t.pk: t for t in get_specific_todos(todos.order_by())}
+
+
+def downcast_todo(todo: Todo, cls: type[Todo], values: dict) -> Todo:
+    data = {f.attname: getattr(todo, f.attname) for f in Todo._meta.concrete_fields}
+    specific = cls(**data, **values)
+    specific._state.adding = False
+    specific._state.db = todo._state.db
+    return specific
+
+
+def get_specific_todos(todos: Iterable[Todo]) -> list[Todo]:
+    """
+    Turn base todos into instances of their concrete subclasses. Only the columns
+    of the subclass tables are loaded, with one query per kind that has own
+    columns.
+    """
+    todos = list(todos)
+    by_kind = group_by(todos, lambda t: t.kind)
+    specific: dict[int, Todo] = {}
+    for kind, items in by_kind.items():
+        cls = TODO_CLASSES.get(kind)
+        if cls is None:
+            specific.update({t.pk: t for t in items})
+            continue
+        fields = [f.attname for f in cls._meta.local_concrete_fields]
+        ptr = cls._meta.pk.attname
+        rows = {t.pk: {ptr: t.pk} for t in items}
+        if len(fields) > 1:
+            qs = cls.objects.filter(pk__in=rows.keys()).order_by()
+            rows = {row[ptr]: row for row in qs.values(*fields)}
+        for t in items:
+            if t.pk in rows:
+                specific[t.pk] = downcast_todo(t, cls, rows[t.pk])
+    return [specific[t.pk] for t in todos if t.pk in specific]
+
+
+def get_todo_list(todos: QuerySet[Todo], kinds: list[str]) -> list[Todo]:
+    todos = todos.annotate(sort=Todo.completed_sort_expression())
+    todos = todos.filter(kind__in=kinds).order_by("sort", *Todo._meta.ordering, "pk")
+    return get_specific_todos(todos)
+
+
+def get_upcoming_occurrences(
+    user: CustomUser, since: datetime, until: datetime
+) -> list[Occurrence]:
+    """
+    The occurrences of all repetitive todos of the user that activate between
+    `since` and `until`. The stored active todos and the ends of the series are
+    loaded with one query, everything after the end of a series is computed in
+    memory. A series whose last todo is not active anymore was stopped, nothing
+    is computed after it.
+    """
+    todos = (
+        RepetitiveTodo.objects.filter(user=user, status="ACTIVE")
+        .annotate(next_pk=F("next"))
+        .filter(Q(activate__gte=since, activate__lt=until) | Q(next_pk=None))
+    )
+    occurrences: list[Occurrence] = []
+    for todo in todos.order_by():
+        if todo.activate and todo.deadline and since <= todo.activate < until:
+            occurrences.append(
+                Occurrence(
+                    todo=todo,
+                    sequence=todo.sequence,
+                    activate=todo.activate,
+                    deadline=todo.deadline,
+                    stored=True,
+                )
+            )
+        if todo.next_pk is None:
+            occurrences.extend(todo.get_occurrences(until, since))
+    return sorted(occurrences, key=lambda o: o["activate"])
 
 
 def setup_duration_field(field: forms.Field):
@@ -1,53 +1,66 @@
+from datetime import date, timedelta
+
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.utils import timezone
 
-from apps.todos.models import (
-    NeverEndingTodo,
-    NormalTodo,
-    NotesTodo,
-    Page,
-    PipelineTodo,
-    RepetitiveTodo,
-    Todo,
-)
+from apps.todos.cache import get_fragment, get_stats
+from apps.todos.models import NotesTodo, Occurrence, Page, Todo
 from apps.todos.utils import (
     get_end_of_next_week,
     get_end_of_week,
     get_start_of_next_week,
     get_start_of_week,
+    get_todo_list,
+    get_upcoming_occurrences,
 )
-from apps.utils.functional import list_sort
+
+LIST_KINDS = ["NormalTodo", "PipelineTodo", "NeverEndingTodo", "RepetitiveTodo"]
+
+
+def render_todos(
+    request: HttpRequest, page_pk: int | None, kind: str, get_context
+) -> HttpResponse:
+    def render_fragment():
+        return render_to_string("todos/symbols/list.html", get_context(), request)
+
+    fragment, hit = get_fragment(request, page_pk, kind, render_fragment)
+    response = render(request, "todos.html", {"fragment": fragment})
+    response["X-Fragment-Cache"] = "hit" if hit else "miss"
+    return response
 
 
 @login_required
 def todos(request: HttpRequest):
-    todos: list[Todo] = []
     kind = request.GET.get("kind", "week")
-    for cls in [NormalTodo, PipelineTodo, NeverEndingTodo, RepetitiveTodo]:
-        f = Q()
-        if kind == "week":
-            start_of_week = get_start_of_week()
-            end_of_week = get_end_of_week()
-            now = timezone.now()
-            f = Q(activate__lte=now, status="ACTIVE") | Q(
-                completed__gte=start_of_week, completed__lte=end_of_week
-            )
-        if kind == "next_week":
-            start_of_next_week = get_start_of_next_week()
-            end_of_next_week = get_end_of_next_week()
-            f = Q(activate__lte=start_of_next_week, status="ACTIVE") | Q(
-                completed__gte=start_of_next_week, completed__lte=end_of_next_week
-            )
-        elif kind == "activated":
-            f = Q(activate__lte=timezone.now())
-        elif kind == "open":
-            f = Q(status="ACTIVE")
-
-        todos += Todo.get_todos_user(request.user, cls).filter(f).filter(page=None)
-    todos = list_sort(todos, lambda t: t.completed_sort)
+    return render_todos(request, None, kind, lambda: get_todos_context(request, kind))
+
+
+def get_todos_context(request: HttpRequest, kind: str):
+    f = Q()
+    if kind == "week":
+        start_of_week = get_start_of_week()
+        end_of_week = get_end_of_week()
+        now = timezone.now()
+        f = Q(activate__lte=now, status="ACTIVE") | Q(
+            completed__gte=start_of_week, completed__lte=end_of_week
+        )
+    if kind == "next_week":
+        start_of_next_week = get_start_of_next_week()
+        end_of_next_week = get_end_of_next_week()
+        f = Q(activate__lte=start_of_next_week, status="ACTIVE") | Q(
+            completed__gte=start_of_next_week, completed__lte=end_of_next_week
+        )
+    elif kind == "activated":
+        f = Q(activate__lte=timezone.now())
+    elif kind == "open":
+        f = Q(status="ACTIVE")
+
+    qs = Todo.get_todos_user(request.user, Todo).filter(f).filter(page=None)
+    todos = get_todo_list(qs, LIST_KINDS)
     top_notes = NotesTodo.objects.filter(
         user=request.user, status="ACTIVE", position=NotesTodo.POSITION_TOP
     )
@@ -55,24 +68,37 @@ def todos(request: HttpRequest):
         user=request.user, status="ACTIVE", position=NotesTodo.POSITION_BOTTOM
     )
     pages = Page.objects.filter(user=request.user).order_by("name")
-    return render(
-        request,
-        "todos.html",
-        {
-            "todos": todos,
-            "top_notes": top_notes,
-            "bottom_notes": bottom_notes,
-            "pages": pages,
-        },
-    )
+    return {
+        "todos": todos,
+        "top_notes": top_notes,
+        "bottom_notes": bottom_notes,
+        "pages": pages,
+    }
+
+
+@login_required
+def upcoming(request: HttpRequest):
+    # the repetitive todos of the next four weeks, most of them not stored yet
+    now = timezone.now()
+    days: dict[date, list[Occurrence]] = {}
+    until = now + timedelta(weeks=4)
+    for occurrence in get_upcoming_occurrences(request.user, now, until):
+        days.setdefault(occurrence["activate"].date(), []).append(occurrence)
+    pages = Page.objects.filter(user=request.user).order_by("name")
+    context = {"days": days.items(), "pages": pages}
+    return render(request, "todos/upcoming.html", context)
 
 
 @login_required
 def page(request: HttpRequest, pk: int):
+    return render_todos(request, pk, "page", lambda: get_page_context(request, pk))
+
+
+def get_page_context(request: HttpRequest, pk: int):
     page = Page.objects.get(pk=pk, user=request.user)
-    todos: list[Todo] = []
-    for cls in [NormalTodo, PipelineTodo, NeverEndingTodo, RepetitiveTodo]:
-        todos += Todo.get_todos_user(request.user, cls).filter(page=page)
+    todos = get_todo_list(
+        Todo.get_todos_user(request.user, Todo).filter(page=page), LIST_KINDS
+    )
     top_notes = NotesTodo.objects.filter(
         page=page, status="ACTIVE", position=NotesTodo.POSITION_TOP
     )
@@ -80,24 +106,18 @@ def page(request: HttpRequest, pk: int):
         page=page, status="ACTIVE", position=NotesTodo.POSITION_BOTTOM
     )
     pages = Page.objects.filter(user=request.user).order_by("name")
-    return render(
-        request,
-        "todos.html",
-        {
-            "page": page,
-            "todos": todos,
-            "top_notes": top_notes,
-            "bottom_notes": bottom_notes,
-            "pages": pages,
-        },
-    )
+    return {
+        "page": page,
+        "todos": todos,
+        "top_notes": top_notes,
+        "bottom_notes": bottom_notes,
+        "pages": pages,
+    }
 
 
 def shared_page(request: HttpRequest, uuid: int):
     page = Page.objects.get(share_uuid=uuid, is_shared=True)
-    todos: list[Todo] = []
-    for cls in [NormalTodo, PipelineTodo, NeverEndingTodo, RepetitiveTodo]:
-        todos += Todo.get_todos(cls.objects.filter(page=page), False).filter(page=page)
+    todos = get_todo_list(Todo.get_todos(Todo.objects.filter(page=page)), LIST_KINDS)
     top_notes = NotesTodo.objects.filter(
         page=page, status="ACTIVE", position=NotesTodo.POSITION_TOP
     )
@@ -114,3 +134,9 @@ def shared_page(request: HttpRequest, uuid: int):
             "bottom_notes": bottom_notes,
         },
     )
+
+
+def cache_stats(request: HttpRequest):
+    if not request.user.is_staff:
+        return HttpResponse("only staff allowed", status=403)
+    return JsonResponse(get_stats())
@@ -1,5 +1,10 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class UploadsConfig(AppConfig):
+class UploadsConfig(FormsConfig):
     name = "apps.uploads"
+    forms = [
+        "apps.uploads.forms.CreateUpload",
+        "apps.uploads.forms.UploadFile",
+        "apps.uploads.forms.DeleteUpload",
+    ]
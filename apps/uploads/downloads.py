@@ -0,0 +1,147 @@
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from apps.uploads.models import FileUpload
+
+
+class FileRange:
+    """
+    The part of a file between the current position and `length` bytes later.
+    fileno lets the wsgi.file_wrapper of the server send the part with
+    os.sendfile, the server stops after the Content-Length of the response.
+    """
+
+    def __init__(self, file, length: int):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def get_etag(file_upload: FileUpload) -> str:
+    # the file of a file upload never changes, a new file is a new file upload
+    return f'"{file_upload.pk}-{file_upload.uploaded_at.timestamp():.0f}"'
+
+
+def get_content_type(filename: str) -> str:
+    content_type, _ = mimetypes.guess_type(filename)
+    return content_type or "application/octet-stream"
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single byte range into its first and last byte. Returns None for
+    anything else, then the whole file is sent. A range that starts behind the
+    end of the file is returned as is and is not satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix == 0:
+                return size, size
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if last and end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def get_range(
+    request: HttpRequest, size: int, etag: str, last_modified: int
+) -> tuple[int, int] | None:
+    header = request.headers.get("Range")
+    if request.method != "GET" or header is None:
+        return None
+    # a range of an older version of the file is answered with the whole file
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range not in [etag, http_date(last_modified)]:
+        return None
+    return parse_range(header, size)
+
+
+def get_file_response(
+    request: HttpRequest, file_upload: FileUpload, etag: str, last_modified: int
+) -> HttpResponseBase:
+    size = file_upload.file.size
+    byte_range = get_range(request, size, etag, last_modified)
+    if byte_range is not None and byte_range[0] >= size:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    filename = file_upload.upload.title
+    file = file_upload.file.open("rb")
+    if byte_range is None:
+        response = FileResponse(file, filename=filename)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(
+            FileRange(file, end - start + 1), filename=filename, status=206
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def get_sendfile_response(file_upload: FileUpload, mode: str) -> HttpResponse:
+    """
+    An empty response that tells the front end server which file to send. It
+    handles ranges by itself.
+    """
+    filename = file_upload.upload.title
+    response = HttpResponse(content_type=get_content_type(filename))
+    if mode == "x-sendfile":
+        response["X-Sendfile"] = file_upload.file.path
+    elif mode == "x-accel-redirect":
+        url = settings.UPLOADS_SENDFILE_URL + file_upload.file.name
+        response["X-Accel-Redirect"] = quote(url)
+    else:
+        raise ImproperlyConfigured(f"unknown UPLOADS_SENDFILE mode '{mode}'")
+    response["Content-Disposition"] = content_disposition_header(False, filename)
+    return response
+
+
+def send_file(request: HttpRequest, file_upload: FileUpload) -> HttpResponseBase:
+    """
+    Answer conditional requests with 304 or 412. Otherwise the file is sent by
+    the front end server if UPLOADS_SENDFILE is set or by django.
+    """
+    etag = get_etag(file_upload)
+    last_modified = int(file_upload.uploaded_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None and settings.UPLOADS_SENDFILE:
+        response = get_sendfile_response(file_upload, settings.UPLOADS_SENDFILE)
+    elif response is None:
+        response = get_file_response(request, file_upload, etag, last_modified)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
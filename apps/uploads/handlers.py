@@ -0,0 +1,90 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+def get_temp_dir() -> str:
+    os.makedirs(settings.UPLOADS_TEMP_DIR, exist_ok=True)
+    return settings.UPLOADS_TEMP_DIR
+
+
+class SpilledUploadedFile(UploadedFile):
+    """
+    An upload that was written to a temp file under MEDIA_ROOT. The storage
+    moves the temp file into place instead of copying it, because it sits on
+    the same filesystem.
+    """
+
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # the file was moved into the storage and the temp file is gone
+            pass
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Keep an upload in memory until it grows past UPLOADS_SPILL_THRESHOLD, then
+    write every further chunk straight to a temp file. The sha256 is computed
+    while the chunks pass through and ends up as the checksum of the file.
+    """
+
+    chunk_size = 64 * 2**10
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.checksum = hashlib.sha256()
+        self.size = 0
+        self.file: BytesIO | tempfile._TemporaryFileWrapper = BytesIO()
+        self.spilled = False
+
+    def spill(self):
+        file = tempfile.NamedTemporaryFile(suffix=".upload", dir=get_temp_dir())
+        file.write(self.file.getbuffer())  # type: ignore
+        self.file = file
+        self.spilled = True
+
+    def receive_data_chunk(self, raw_data: bytes, start: int):
+        self.checksum.update(raw_data)
+        self.size += len(raw_data)
+        if not self.spilled and self.size > settings.UPLOADS_SPILL_THRESHOLD:
+            self.spill()
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size: int) -> UploadedFile:
+        self.file.flush()
+        self.file.seek(0)
+        if self.spilled:
+            upload: UploadedFile = SpilledUploadedFile(
+                self.file,
+                self.file_name,
+                self.content_type,
+                file_size,
+                self.charset,
+                self.content_type_extra,
+            )
+        else:
+            upload = InMemoryUploadedFile(
+                self.file,
+                self.field_name,
+                self.file_name,
+                self.content_type,
+                file_size,
+                self.charset,
+                self.content_type_extra,
+            )
+        upload.checksum = self.checksum.hexdigest()  # type: ignore
+        return upload
+
+    def upload_interrupted(self):
+        if self.spilled:
+            self.file.close()
@@ -0,0 +1,97 @@
+import hashlib
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.http.multipartparser import MultiPartParser
+
+from apps.uploads.handlers import StreamingUploadHandler
+
+BOUNDARY = "benchupload"
+
+
+class MultipartBody:
+    """
+    A multipart body with a single file of `size` bytes. The bytes of the file
+    are generated while the body is read, so the body itself needs no memory.
+    """
+
+    def __init__(self, size: int):
+        self.head = (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="bench.bin"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+        self.size = size
+        self.length = len(self.head) + size + len(self.tail)
+        self.pos = 0
+
+    @staticmethod
+    def get_checksum(size: int) -> str:
+        checksum = hashlib.sha256()
+        for start in range(0, size, 2**20):
+            checksum.update(b"x" * min(2**20, size - start))
+        return checksum.hexdigest()
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0:
+            n = self.length - self.pos
+        end = min(self.pos + n, self.length)
+        body_end = len(self.head) + self.size
+        out = b""
+        if self.pos < len(self.head):
+            out += self.head[self.pos : end]
+        if end > len(self.head) and self.pos < body_end:
+            out += b"x" * (min(end, body_end) - max(self.pos, len(self.head)))
+        if end > body_end:
+            out += self.tail[max(self.pos - body_end, 0) : end - body_end]
+        self.pos = end
+        return out
+
+
+def measure(size: int) -> dict:
+    """
+    Parse an upload of `size` bytes through the streaming upload handler.
+    Returns the peak of the memory allocated by python while parsing.
+    """
+    body = MultipartBody(size)
+    meta = {
+        "CONTENT_TYPE": f"multipart/form-data; boundary={BOUNDARY}",
+        "CONTENT_LENGTH": str(body.length),
+    }
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        _, files = MultiPartParser(meta, body, [StreamingUploadHandler()]).parse()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    file = files["file"]
+    file.close()
+    return {
+        "size": file.size,
+        "checksum": file.checksum,
+        "spilled": hasattr(file, "temporary_file_path"),
+        "peak": peak,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure the memory needed to receive a large upload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mb", type=int, default=1024)
+
+    def handle(self, *args, **options):
+        stats = measure(options["mb"] * 2**20)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(
+            f"{stats['size'] / 2**20:.0f} MB in {stats['seconds']:.1f} s, "
+            f"spilled: {stats['spilled']}"
+        )
+        self.stdout.write(f"python peak: {stats['peak'] / 2**20:.1f} MB")
+        self.stdout.write(f"max rss: {maxrss / 2**10:.1f} MB")
+        self.stdout.write(f"sha256: {stats['checksum']}")
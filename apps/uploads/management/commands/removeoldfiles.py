@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.uploads.models import FileUpload
+from apps.uploads.storage import get_blob_storage
+
+
+def remove_old_files() -> list[str]:
+    """
+    Delete the files under files/ that no file upload references anymore. The
+    blobs migration copied them into blobs/ and left the originals behind.
+    """
+    storage = get_blob_storage()
+    root = storage.path("files")
+    removed = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, storage.location).replace("\\", "/")
+            if not FileUpload.objects.filter(file=name).exists():
+                os.remove(path)
+                removed.append(name)
+    return removed
+
+
+class Command(BaseCommand):
+    help = "Remove the files that were copied into the blob storage"
+
+    def handle(self, *args, **options):
+        removed = remove_old_files()
+        for name in removed:
+            self.stdout.write(f"removed {name}")
+        self.stdout.write(f"{len(removed)} files removed")
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.uploads.models import Blob
+
+
+class Command(BaseCommand):
+    help = "Remove the stored files that no upload references anymore"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="only remove files that were unreferenced for this long",
+        )
+
+    def handle(self, *args, **options):
+        fixed = Blob.reconcile()
+        self.stdout.write(f"{fixed} reference counts corrected")
+        removed = Blob.sweep(timedelta(minutes=options["minutes"]))
+        for name in removed:
+            self.stdout.write(f"removed {name}")
+        self.stdout.write(f"{len(removed)} files removed")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uploads", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileupload",
+            name="checksum",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:04
+
+import hashlib
+import os
+import shutil
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+import apps.uploads.storage
+
+
+def get_blob_name(checksum: str) -> str:
+    return f"blobs/{checksum[:2]}/{checksum}"
+
+
+def copy_to_blobs(apps, schema_editor):
+    """
+    Link or copy the existing files into blobs/. The originals stay until the
+    removeoldfiles command deletes them, so a rollback of this migration leaves
+    every row pointing at an existing file.
+    """
+    FileUpload = apps.get_model("uploads", "FileUpload")
+    Blob = apps.get_model("uploads", "Blob")
+    refs: dict[str, int] = {}
+    for file_upload in FileUpload.objects.exclude(file__startswith="blobs/"):
+        path = os.path.join(settings.MEDIA_ROOT, file_upload.file.name)
+        if not os.path.exists(path):
+            continue
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                sha.update(chunk)
+        checksum = sha.hexdigest()
+        name = get_blob_name(checksum)
+        blob_path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(path, blob_path)
+            except OSError:
+                shutil.copyfile(path, blob_path)
+        FileUpload.objects.filter(pk=file_upload.pk).update(
+            file=name, checksum=checksum
+        )
+        refs[checksum] = refs.get(checksum, 0) + 1
+    Blob.objects.bulk_create(
+        [Blob(checksum=checksum, refs=count) for checksum, count in refs.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uploads", "0002_checksum"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("checksum", models.CharField(max_length=64, unique=True)),
+                ("refs", models.PositiveIntegerField(default=0)),
+                ("updated", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Blob",
+                "verbose_name_plural": "Blobs",
+            },
+        ),
+        migrations.AlterField(
+            model_name="fileupload",
+            name="file",
+            field=models.FileField(
+                storage=apps.uploads.storage.get_blob_storage, upload_to="blobs/"
+            ),
+        ),
+        migrations.RunPython(copy_to_blobs, migrations.RunPython.noop),
+    ]
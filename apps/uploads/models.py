@@ -1,9 +1,20 @@
-from typing import TYPE_CHECKING
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable
 
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 
+from apps.uploads.storage import get_blob_name, get_blob_storage, get_checksum
 from apps.users.models import CustomUser
 
+logger = logging.getLogger(__name__)
+
 
 class Upload(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -29,20 +40,30 @@ class Upload(models.Model):
         return f.file
 
     def create_file(self, file) -> "FileUpload":
-        file_upload = FileUpload(upload=self, file=file)
-        file_upload.save()
+        checksum = get_checksum(file)
+        with transaction.atomic():
+            # referenced before it is written so that a sweep can not remove it
+            Blob.acquire(checksum)
+            file_upload = FileUpload(upload=self, file=file, checksum=checksum)
+            file_upload.save()
         return file_upload
 
     def delete(self, *args, **kwargs):
-        for file_upload in self.files.all():
-            file_upload.file.delete(save=False)
-        return super().delete(*args, **kwargs)
+        # the rows go in one transaction, the files are unlinked after commit
+        with transaction.atomic():
+            checksums = list(self.files.values_list("checksum", flat=True))
+            Blob.release(checksums)
+            deleted = super().delete(*args, **kwargs)
+            transaction.on_commit(lambda: remove_in_background(checksums))
+        return deleted
 
 
 class FileUpload(models.Model):
     upload = models.ForeignKey(Upload, on_delete=models.CASCADE, related_name="files")
-    file = models.FileField(upload_to="files/")
+    # BlobStorage names the file after its content, upload_to is only the folder
+    file = models.FileField(upload_to="blobs/", storage=get_blob_storage)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    checksum = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         verbose_name = "File Upload"
@@ -51,3 +72,135 @@ class FileUpload(models.Model):
 
     def __str__(self):
         return self.file.name
+
+
+class Blob(models.Model):
+    """
+    A file of the blob storage and the number of file uploads that reference
+    it. Identical uploads share one blob.
+    """
+
+    checksum = models.CharField(max_length=64, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Blob"
+        verbose_name_plural = "Blobs"
+
+    def __str__(self):
+        return get_blob_name(self.checksum)
+
+    @staticmethod
+    def acquire(checksum: str) -> None:
+        Blob.objects.get_or_create(checksum=checksum)
+        Blob.objects.filter(checksum=checksum).update(
+            refs=F("refs") + 1, updated=timezone.now()
+        )
+
+    @staticmethod
+    def release(checksums: Iterable[str]) -> None:
+        # one update for all blobs that lose the same number of references
+        counts = Counter(c for c in checksums if c)
+        by_count: dict[int, list[str]] = {}
+        for checksum, count in counts.items():
+            by_count.setdefault(count, []).append(checksum)
+        now = timezone.now()
+        for count, group in by_count.items():
+            Blob.objects.filter(checksum__in=group).update(
+                refs=F("refs") - count, updated=now
+            )
+
+    @staticmethod
+    def sweep(grace: timedelta) -> list[str]:
+        """
+        Remove the blobs that nothing referenced for longer than grace. Files
+        under blobs/ without a row are removed as well, a crash between writing
+        a file and committing its row leaves them behind. Returns the removed
+        names.
+        """
+        storage = get_blob_storage()
+        cutoff = timezone.now() - grace
+        with transaction.atomic():
+            removed = Blob.remove(Blob.objects.filter(updated__lt=cutoff))
+            orphans = []
+            known = set(Blob.objects.values_list("checksum", flat=True))
+            if storage.exists("blobs"):
+                for prefix in storage.listdir("blobs")[0]:
+                    for checksum in storage.listdir(f"blobs/{prefix}")[1]:
+                        name = get_blob_name(checksum)
+                        if checksum in known or name in removed:
+                            continue
+                        if storage.get_modified_time(name) < cutoff:
+                            orphans.append(name)
+            for name in orphans:
+                storage.delete(name)
+        return removed + orphans
+
+    @staticmethod
+    def remove(blobs: models.QuerySet["Blob"]) -> list[str]:
+        """
+        Delete the unreferenced blobs of the queryset and their files. Returns
+        the removed names.
+        """
+        storage = get_blob_storage()
+        # the files are removed inside the transaction, a concurrent upload of
+        # the same content waits for it and writes the file again
+        with transaction.atomic():
+            unused = blobs.filter(refs=0)
+            checksums = list(unused.values_list("checksum", flat=True))
+            unused.delete()
+            removed = [get_blob_name(checksum) for checksum in checksums]
+            for name in removed:
+                storage.delete(name)
+        return removed
+
+    @staticmethod
+    def reconcile() -> int:
+        """
+        Recount the references from the file uploads. Deletes that bypass
+        Upload.delete, like the cascade of a user or a queryset delete, leave
+        the counts too high. Returns the number of corrected blobs.
+        """
+        with transaction.atomic():
+            counts = dict(
+                FileUpload.objects.exclude(checksum="")
+                .values("checksum")
+                .annotate(refs=models.Count("pk"))
+                .values_list("checksum", "refs")
+            )
+            now = timezone.now()
+            wrong = []
+            for blob in Blob.objects.all():
+                refs = counts.pop(blob.checksum, 0)
+                if blob.refs != refs:
+                    blob.refs, blob.updated = refs, now
+                    wrong.append(blob)
+            Blob.objects.bulk_update(wrong, ["refs", "updated"])
+            missing = [Blob(checksum=c, refs=n) for c, n in counts.items()]
+            Blob.objects.bulk_create(missing)
+        return len(wrong) + len(missing)
+
+
+@lru_cache
+def get_unlink_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.UPLOADS_UNLINK_WORKERS, thread_name_prefix="unlink"
+    )
+
+
+def remove_unused_blobs(checksums: list[str]):
+    try:
+        Blob.remove(Blob.objects.filter(checksum__in=checksums))
+    except Exception:
+        # the blobs stay unreferenced and the next sweep removes them
+        logger.exception("removing the blobs %s failed", checksums)
+    finally:
+        connection.close()
+
+
+def remove_in_background(checksums: list[str]):
+    if not settings.UPLOADS_UNLINK_WORKERS:
+        Blob.remove(Blob.objects.filter(checksum__in=checksums))
+        return
+    get_unlink_executor().submit(remove_unused_blobs, checksums)
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.core.files.storage import FileSystemStorage
+
+
+def get_blob_name(checksum: str) -> str:
+    return f"blobs/{checksum[:2]}/{checksum}"
+
+
+def get_checksum(content) -> str:
+    # the streaming upload handler computes the checksum on the way in
+    checksum = getattr(content, "checksum", None)
+    if checksum is None:
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        checksum = content.checksum = sha.hexdigest()
+    return checksum
+
+
+class BlobStorage(FileSystemStorage):
+    """
+    Store every file under the sha256 of its content. Content that is stored
+    already is not written again, the name of the stored blob is returned. The
+    blobs are counted and removed by apps.uploads.models.Blob.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        name = get_blob_name(get_checksum(content))
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+blob_storage = BlobStorage()
+
+
+def get_blob_storage() -> BlobStorage:
+    return blob_storage
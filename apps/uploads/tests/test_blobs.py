@@ -0,0 +1,167 @@
+import os
+import time
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.uploads.models import Blob, FileUpload, Upload, get_unlink_executor
+from apps.users.tests.helpers import create_user
+
+
+def get_stored(tmp_path) -> list[str]:
+    return sorted(p.name for p in (tmp_path / "blobs").glob("*/*"))
+
+
+def test_identical_files_are_stored_once(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = create_user(save=True)
+    a = Upload.objects.create(user=user, title="a")
+    b = Upload.objects.create(user=user, title="b")
+
+    first = a.create_file(ContentFile(b"same", name="a.pdf"))
+    second = b.create_file(ContentFile(b"same", name="b.pdf"))
+    a.create_file(ContentFile(b"other", name="a.pdf"))
+
+    assert first.file.name == second.file.name
+    assert first.file.name == f"blobs/{first.checksum[:2]}/{first.checksum}"
+    assert len(get_stored(tmp_path)) == 2
+    assert Blob.objects.get(checksum=first.checksum).refs == 2
+
+
+def test_duplicate_upload_is_not_written(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.UPLOADS_TEMP_DIR = str(tmp_path / "tmp")
+    settings.UPLOADS_SPILL_THRESHOLD = 1024
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    content = os.urandom(8192)
+
+    for title in ["first", "second"]:
+        file = ContentFile(content, name="data.bin")
+        c.post(reverse("form", args=["CreateUpload"]), {"title": title, "file": file})
+        stored = (
+            tmp_path / "blobs" / get_stored(tmp_path)[0][:2] / get_stored(tmp_path)[0]
+        )
+        if title == "first":
+            written = stored.stat().st_mtime_ns
+            time.sleep(0.01)
+
+    assert stored.stat().st_mtime_ns == written
+    assert len(get_stored(tmp_path)) == 1
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert (
+        FileUpload.objects.filter(file=f"blobs/{stored.name[:2]}/{stored.name}").count()
+        == 2
+    )
+
+
+def test_delete_releases_blobs_in_bulk(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = create_user(save=True)
+    upload = Upload.objects.create(user=user, title="a")
+    for content in [b"1", b"2", b"2", b"3"]:
+        upload.create_file(ContentFile(content, name="a.txt"))
+    other = Upload.objects.create(user=user, title="b")
+    other.create_file(ContentFile(b"3", name="b.txt"))
+
+    with CaptureQueriesContext(connection) as ctx:
+        upload.delete()
+    updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+
+    assert len(updates) == 2
+    assert sorted(Blob.objects.values_list("refs", flat=True)) == [0, 0, 1]
+    assert len(get_stored(tmp_path)) == 3
+
+
+def test_sweep(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = create_user(save=True)
+    upload = Upload.objects.create(user=user, title="a")
+    kept = upload.create_file(ContentFile(b"kept", name="a.txt"))
+    gone = Upload.objects.create(user=user, title="b").create_file(
+        ContentFile(b"gone", name="b.txt")
+    )
+    Upload.objects.get(title="b").delete()
+    # files a crash left behind without a row
+    (tmp_path / "blobs" / "00").mkdir()
+    (tmp_path / "blobs" / "00" / "00old").write_bytes(b"orphan")
+    (tmp_path / "blobs" / "00" / "00new").write_bytes(b"orphan")
+    long_ago = time.time() - 7200
+    os.utime(tmp_path / "blobs" / "00" / "00old", (long_ago, long_ago))
+
+    assert Blob.sweep(timedelta(hours=1)) == ["blobs/00/00old"]
+    Blob.objects.update(updated=timezone.now() - timedelta(hours=2))
+    removed = Blob.sweep(timedelta(hours=1))
+
+    assert len(removed) == 1 and removed[0].endswith(gone.checksum)
+    assert get_stored(tmp_path) == sorted([kept.checksum, "00new"])
+    assert list(Blob.objects.values_list("checksum", flat=True)) == [kept.checksum]
+    # the content comes back when it is uploaded again
+    again = upload.create_file(ContentFile(b"gone", name="b.txt"))
+    assert again.file.read() == b"gone"
+
+
+def create_versions(user, title: str, contents: list[bytes]) -> Upload:
+    upload = Upload.objects.create(user=user, title=title)
+    for content in contents:
+        upload.create_file(ContentFile(content, name=f"{title}.txt"))
+    return upload
+
+
+def test_delete_unlinks_after_commit(
+    db, settings, tmp_path, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.UPLOADS_UNLINK_WORKERS = 0
+    user = create_user(save=True)
+    upload = create_versions(user, "a", [b"1", b"2", b"2", b"3"])
+    kept = create_versions(user, "b", [b"3"]).files.get()
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        upload.delete()
+        assert len(get_stored(tmp_path)) == 3
+
+    assert len(callbacks) == 1
+    assert get_stored(tmp_path) == [kept.checksum]
+    assert list(Blob.objects.values_list("checksum", "refs")) == [(kept.checksum, 1)]
+
+
+def test_delete_unlinks_in_a_thread(transactional_db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.UPLOADS_UNLINK_WORKERS = 1
+    get_unlink_executor.cache_clear()
+    upload = create_versions(create_user(save=True), "a", [b"1", b"2"])
+
+    upload.delete()
+    # the single worker runs the jobs in order
+    get_unlink_executor().submit(lambda: None).result()
+
+    assert get_stored(tmp_path) == []
+    assert not Blob.objects.exists()
+    get_unlink_executor().shutdown()
+    get_unlink_executor.cache_clear()
+
+
+def test_reconcile(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = create_user(save=True)
+    create_versions(user, "a", [b"1", b"1", b"2"])
+    other = create_user(email="other@abc.de", save=True)
+    create_versions(other, "b", [b"2"])
+    Blob.objects.filter(checksum=FileUpload.objects.first().checksum).delete()
+
+    # the cascade of the user bypasses Upload.delete
+    user.delete()
+
+    assert Blob.reconcile() == 2
+    assert sorted(Blob.objects.values_list("refs", flat=True)) == [0, 1]
+    assert Blob.reconcile() == 0
+    Blob.objects.update(updated=timezone.now() - timedelta(hours=2))
+    assert len(Blob.sweep(timedelta(hours=1))) == 1
+    assert len(get_stored(tmp_path)) == 1
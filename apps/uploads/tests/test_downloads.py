@@ -0,0 +1,129 @@
+from wsgiref.util import FileWrapper
+
+import pytest
+from django.core.files.base import ContentFile
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from apps.uploads import views
+from apps.uploads.downloads import parse_range
+from apps.uploads.models import FileUpload, Upload
+from apps.users.tests.helpers import create_user
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def download(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = create_user(save=True, password="pass1234!")
+    upload = Upload.objects.create(user=user, title="data.bin")
+    file_upload = upload.create_file(ContentFile(CONTENT, name="data.bin"))
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    return c, reverse("download", args=[upload.pk]), file_upload
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=100-", 100) == (100, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=9-1", 100) is None
+    assert parse_range("lines=0-1", 100) is None
+    assert parse_range("bytes=a-", 100) is None
+
+
+def test_download(download):
+    c, url, file_upload = download
+
+    response = c.get(url)
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == CONTENT
+    assert response["Content-Length"] == str(len(CONTENT))
+    assert response["Accept-Ranges"] == "bytes"
+    assert (
+        response["ETag"]
+        == f'"{file_upload.pk}-{file_upload.uploaded_at.timestamp():.0f}"'
+    )
+    assert "Last-Modified" in response
+    assert 'filename="data.bin"' in response["Content-Disposition"]
+
+
+def test_download_is_owned(download):
+    _, url, _ = download
+    other = create_user(email="other@abc.de", save=True, password="pass1234!")
+    c = Client()
+    c.login(email=other.email, password="pass1234!")
+
+    assert c.get(url).status_code == 404
+
+
+def test_download_range(download):
+    c, url, _ = download
+
+    response = c.get(url, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == CONTENT[10:20]
+    assert response["Content-Length"] == "10"
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    response = c.get(url, HTTP_RANGE="bytes=-4")
+    assert b"".join(response.streaming_content) == CONTENT[-4:]
+
+    response = c.get(url, HTTP_RANGE=f"bytes={len(CONTENT)}-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_download_range_through_file_wrapper(download):
+    _, url, file_upload = download
+    request = RequestFactory().get(url, HTTP_RANGE="bytes=100-299")
+    request.user = file_upload.upload.user
+
+    response = views.download(request, file_upload.upload.pk)
+
+    # the same object a wsgi server gets to hand to os.sendfile
+    assert response.file_to_stream.fileno() > 0
+    assert b"".join(FileWrapper(response.file_to_stream, 64)) == CONTENT[100:300]
+    response.close()
+
+
+def test_download_conditional(download):
+    c, url, _ = download
+    response = c.get(url)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    response.close()
+
+    assert c.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert c.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+    assert c.get(url, HTTP_IF_MATCH='"other"').status_code == 412
+    response = c.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"other"')
+    assert response.status_code == 200
+    response.close()
+    response = c.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+    assert response.status_code == 206
+    response.close()
+
+
+def test_download_sendfile(download, settings):
+    c, url, file_upload = download
+
+    settings.UPLOADS_SENDFILE = "x-sendfile"
+    response = c.get(url)
+    assert response["X-Sendfile"] == file_upload.file.path
+    assert response.content == b""
+
+    settings.UPLOADS_SENDFILE = "x-accel-redirect"
+    response = c.get(url)
+    assert response["X-Accel-Redirect"] == f"/protected/{file_upload.file.name}"
+    assert "ETag" in response
+
+    response = c.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+    assert "X-Accel-Redirect" not in response
+    assert FileUpload.objects.count() == 1
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import reverse
+
+from apps.uploads.management.commands.benchupload import MultipartBody, measure
+from apps.uploads.models import FileUpload
+from apps.users.tests.helpers import create_user
+
+
+def test_small_upload_stays_in_memory(settings, tmp_path):
+    settings.UPLOADS_TEMP_DIR = str(tmp_path)
+
+    stats = measure(1000)
+
+    assert not stats["spilled"]
+    assert stats["size"] == 1000
+    assert stats["checksum"] == MultipartBody.get_checksum(1000)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_upload_memory_stays_flat(settings, tmp_path):
+    settings.UPLOADS_TEMP_DIR = str(tmp_path)
+    settings.UPLOADS_SPILL_THRESHOLD = 2**20
+    size = 64 * 2**20
+
+    stats = measure(size)
+
+    assert stats["spilled"]
+    assert stats["size"] == size
+    assert stats["checksum"] == MultipartBody.get_checksum(size)
+    assert stats["peak"] < 4 * 2**20
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_create_upload_moves_the_temp_file(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.UPLOADS_TEMP_DIR = str(tmp_path / "tmp")
+    settings.UPLOADS_SPILL_THRESHOLD = 1024
+    user = create_user(save=True, password="pass1234!")
+    c = Client()
+    c.login(email=user.email, password="pass1234!")
+    content = bytes(range(256)) * 32
+
+    response = c.post(
+        reverse("form", args=["CreateUpload"]),
+        {"title": "data", "file": SimpleUploadedFile("data.bin", content)},
+    )
+
+    assert response.status_code == 302
+    file_upload = FileUpload.objects.get()
+    assert file_upload.checksum == hashlib.sha256(content).hexdigest()
+    assert file_upload.file.read() == content
+    assert list((tmp_path / "tmp").iterdir()) == []
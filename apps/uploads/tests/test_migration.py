@@ -0,0 +1,31 @@
+import importlib
+
+from django.apps import apps
+
+from apps.uploads.management.commands.removeoldfiles import remove_old_files
+from apps.uploads.models import Blob, FileUpload, Upload
+from apps.users.tests.helpers import create_user
+
+
+def test_old_files_are_copied_to_blobs(db, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    (tmp_path / "files").mkdir()
+    for name, content in [("a", b"x"), ("b", b"x"), ("c", b"y")]:
+        (tmp_path / "files" / name).write_bytes(content)
+    upload = Upload.objects.create(user=create_user(save=True), title="t")
+    for name in "abcd":
+        FileUpload.objects.create(upload=upload, file=f"files/{name}")
+    migration = importlib.import_module("apps.uploads.migrations.0003_blobs")
+
+    migration.copy_to_blobs(apps, None)
+
+    # the originals are still there until the migration is committed
+    assert sorted(p.name for p in (tmp_path / "files").iterdir()) == ["a", "b", "c"]
+    files = dict(FileUpload.objects.values_list("file", "checksum"))
+    assert "files/d" in files and len(files) == 3
+    assert sorted(Blob.objects.values_list("refs", flat=True)) == [1, 2]
+    for file_upload in FileUpload.objects.exclude(file="files/d"):
+        assert file_upload.file.read() in [b"x", b"y"]
+
+    assert sorted(remove_old_files()) == ["files/a", "files/b", "files/c"]
+    assert list((tmp_path / "files").iterdir()) == []
@@ -1,8 +1,9 @@
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, HttpRequest
+from django.http import Http404, HttpRequest
 from django.shortcuts import render
 
-from apps.uploads.models import Upload
+from apps.uploads.downloads import send_file
+from apps.uploads.models import FileUpload, Upload
 
 
 @login_required
@@ -13,5 +14,11 @@ def uploads(request: HttpRequest):
 
 @login_required
 def download(request: HttpRequest, pk: int):
-    upload = Upload.objects.get(pk=pk, user=request.user)
-    return FileResponse(upload.file.open(), filename=upload.title, as_attachment=False)
+    file_upload = (
+        FileUpload.objects.select_related("upload")
+        .filter(upload=pk, upload__user=request.user)
+        .first()
+    )
+    if file_upload is None:
+        raise Http404("upload not found")
+    return send_file(request, file_upload)
@@ -1,6 +1,13 @@
-from django.apps import AppConfig
+from apps.actions import FormsConfig
 
 
-class UsersConfig(AppConfig):
+class UsersConfig(FormsConfig):
     name = "apps.users"
     verbose_name = "Users"
+    forms = [
+        "apps.users.forms.Login",
+        "apps.users.forms.Register",
+        "apps.users.forms.ResetPassword",
+        "apps.users.forms.ChangeEmail",
+        "apps.users.forms.ChangePassword",
+    ]
@@ -1,9 +1,58 @@
+import asyncio
+import time
 from functools import lru_cache
+from typing import Awaitable, Callable
 
-import telegram
 from django.conf import settings
 
 
 @lru_cache
 def get_bot():
-    return telegram.Bot(token=settings.TELEGRAM_BOT_TOKEN)
+    # telegram takes long to import and only the bot commands need it
+    import telegram
+    from telegram.request import HTTPXRequest
+
+    # one connection pool shared by every concurrent request of the bot
+    request = HTTPXRequest(connection_pool_size=settings.TELEGRAM_CONCURRENCY)
+    return telegram.Bot(
+        token=settings.TELEGRAM_BOT_TOKEN,
+        base_url=settings.TELEGRAM_BASE_URL,
+        request=request,
+    )
+
+
+class RateLimiter:
+    """
+    Space out the messages of the bot so that the telegram limits hold: about
+    30 messages per second overall, one per second in a private chat and 20 per
+    minute in a group. Group chat ids are negative.
+    """
+
+    def __init__(
+        self,
+        per_second: float = 30,
+        chat_interval: float = 1,
+        group_interval: float = 3,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.interval = 1 / per_second
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0.0
+        self.next_chat_slot: dict[str, float] = {}
+
+    async def wait(self, chat_id: str):
+        # reserve the slot before sleeping so that concurrent callers queue up
+        now = self.clock()
+        chat_id = str(chat_id)
+        at = max(now, self.next_slot, self.next_chat_slot.get(chat_id, now))
+        interval = (
+            self.group_interval if chat_id.startswith("-") else self.chat_interval
+        )
+        self.next_slot = at + self.interval
+        self.next_chat_slot[chat_id] = at + interval
+        if at > now:
+            await self.sleep(at - now)
@@ -1,24 +1,17 @@
 from django.conf import settings
 from django.contrib.auth.views import redirect_to_login
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 
-from apps.actions import FORMS, NAVS, FormClass
+from apps.actions import NAVS, FormClass, load_form_class
 from apps.utils.functional import list_map
 from config.errors import GetFormError, InvalidUserError
 
 
-def get_name(cls: type[object]):
-    return cls.__name__
-
-
-FORMS_DICT: dict[str, type[FormClass]] = {get_name(c): c for c in FORMS}
-
-
 def get_form_class(form_name: str | None) -> type[FormClass]:
     if form_name is None:
         raise GetFormError("form needs to be supplied")
-    form_class = FORMS_DICT.get(form_name, None)
+    form_class = load_form_class(form_name)
     if form_class is None:
         raise GetFormError(f"form with name '{form_name}' not found")
     return form_class
@@ -28,6 +21,27 @@ def get_navs(form: FormClass) -> list[str]:
     return list_map(form.addons.get("navs", []), lambda n: NAVS.get(n, ""))
 
 
+def get_partial(request: HttpRequest) -> str | None:
+    # a client asks for "json" or "fragment" instead of the redirect
+    partial = request.headers.get("X-Partial", request.GET.get("partial"))
+    return partial if partial in ["json", "fragment"] else None
+
+
+def has_partial(form_class: type[FormClass], partial: str) -> bool:
+    if partial == "json":
+        return hasattr(form_class, "get_json")
+    return hasattr(form_class, "fragment_template")
+
+
+def partial_response(
+    request: HttpRequest, form: FormClass, partial: str
+) -> HttpResponse:
+    if partial == "json":
+        return JsonResponse(form.get_json())  # type: ignore
+    context = form.get_fragment_context()  # type: ignore
+    return render(request, form.fragment_template, context)  # type: ignore
+
+
 def set_request(form: FormClass, request: HttpRequest) -> None:
     if hasattr(form, "inject_request"):
         form.inject_request(request)  # type: ignore
@@ -48,6 +62,10 @@ def form_view(
     except GetFormError as e:
         return HttpResponse(str(e), 400)
 
+    partial = get_partial(request) if request.method == "POST" else None
+    if partial and not has_partial(form_class, partial):
+        return HttpResponse(f"form does not support {partial} responses", status=400)
+
     data = None
     if request.method == "POST":
         data = {}
@@ -63,11 +81,17 @@ def form_view(
     try:
         form = form_class(request.user, opts=request.GET.dict(), data=data, files=files)
     except InvalidUserError:
+        if partial:
+            return HttpResponse("login required", status=403)
         return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
     set_request(form, request)
+    if partial and not form.is_valid():
+        return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
     if request.method == "POST" and form.is_valid():
         # ret = form.ok()
         form.ok()
+        if partial:
+            return partial_response(request, form, partial)
         if form._has_addon("stay_on_page"):
             return redirect(request.get_full_path())
         success = getattr(form, "success", None)
@@ -75,11 +75,35 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "config.sqlite3",
         "NAME": os.path.join(TMP_DIR, "db.sqlite3"),
+        # keep one connection per wsgi thread instead of one per request
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,  # in KiB
+    "busy_timeout": 5000,  # in ms
+}
+
+# a single mod_wsgi process, so the local memory cache is shared by all threads.
+# with more processes switch to django.core.cache.backends.filebased.FileBasedCache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "goals",
+    }
+}
+
+TODOS_FRAGMENT_TIMEOUT = 60  # due dates are rendered relative to now
+TODOS_MESSAGE_RETENTION_DAYS = 90
+
 LOGIN_URL = "/admin/login/"
 AUTH_USER_MODEL = "users.CustomUser"
 
@@ -118,6 +142,20 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(TMP_DIR, "media")
 
+FILE_UPLOAD_HANDLERS = ["apps.uploads.handlers.StreamingUploadHandler"]
+# uploads larger than this are streamed to a temp file instead of memory
+UPLOADS_SPILL_THRESHOLD = 2.5 * 2**20
+# inside MEDIA_ROOT so that a finished upload is moved and not copied
+UPLOADS_TEMP_DIR = os.path.join(MEDIA_ROOT, "tmp")
+# threads that unlink the files of deleted uploads after the commit, with 0 the
+# request unlinks them itself
+UPLOADS_UNLINK_WORKERS = 1
+# let the front end server send downloads, "x-sendfile" for apache with
+# mod_xsendfile or "x-accel-redirect" for nginx, None sends them from django
+UPLOADS_SENDFILE = None
+# the internal nginx location that serves MEDIA_ROOT for x-accel-redirect
+UPLOADS_SENDFILE_URL = "/protected/"
+
 LOGIN_URL = "/global-form/Login/"
 LOGIN_REDIRECT_URL = "/todos/todos/"
 LOGOUT_REDIRECT_URL = "/global-form/Login/"
@@ -163,3 +201,9 @@ CUSTOM_ALLOW_REGISTRATION = True
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 365  # 1 year
 
 TELEGRAM_BOT_TOKEN = get_secret("TELEGRAM_BOT_TOKEN")
+TELEGRAM_BASE_URL = "https://api.telegram.org/bot"
+# pages sent at the same time, also the size of the http connection pool
+TELEGRAM_CONCURRENCY = 8
+# runbotscheduler touches the health file at least once a minute
+TODOS_SCHEDULER_HEALTH_FILE = os.path.join(TMP_DIR, "botscheduler.health")
+TODOS_OUTBOX_POLL_INTERVAL = 2  # seconds between looks into the bot outbox
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # the default sqlite backend with the pragmas from settings.SQLITE_PRAGMAS
+    # applied to every new connection
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for key, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            conn.execute(f"PRAGMA {key}={value}")
+        return conn